@@ -2,11 +2,19 @@
 Circuit analysis functions, including short circuit detection.
 """
 
+from collections import defaultdict
+from itertools import combinations
+
 from .graph_utils import (
     get_component_connectivity,
+    get_component_instances,
+    get_node_kinds,
     get_preferred_net_name_for_reconstruction,
 )
 
+# Nets that must never be connected to each other, in reporting order
+_KEY_NETS = ("VDD", "GND", "VSS", "VCC")
+
 
 def detect_short_circuits(graph, dsu):
     """
@@ -27,56 +35,90 @@ def detect_short_circuits(graph, dsu):
     detected_shorts = []
 
     # 1. Check for components shorting their own terminals
-    component_instance_nodes = [n for n, data in graph.nodes(data=True) if data.get("node_kind") == "component_instance"]
+    graph_degree = graph.degree
+    node_kinds = get_node_kinds(graph)
+    for comp_name in get_component_instances(graph, node_kinds):
+        # A short needs two terminals on one net, so at least two incident edges
+        if graph_degree(comp_name) < 2:
+            continue
+        term_to_canonical_net_map, _ = get_component_connectivity(graph, comp_name, node_kinds)
 
-    for comp_name in component_instance_nodes:
-        term_to_canonical_net_map, _ = get_component_connectivity(graph, comp_name)
+        # The usual case of all terminals on distinct nets needs no grouping
+        if len(term_to_canonical_net_map) < 2:
+            continue
+        if len(set(term_to_canonical_net_map.values())) == len(term_to_canonical_net_map):
+            continue
 
         # Group terminals by the canonical net they connect to
-        net_to_terminals_map = {}
+        net_to_terminals_map = defaultdict(list)
         for terminal, canonical_net in term_to_canonical_net_map.items():
-            if canonical_net not in net_to_terminals_map:
-                net_to_terminals_map[canonical_net] = []
             net_to_terminals_map[canonical_net].append(terminal)
 
-        # Check if any net connects to more than one terminal of this component
-        for canonical_net, terminals_list in net_to_terminals_map.items():
-            if len(terminals_list) > 1:
-                preferred_net_name = get_preferred_net_name_for_reconstruction(
-                    canonical_net, dsu, allow_implicit_if_only_option=True
-                )
-                detected_shorts.append(
-                    {
-                        "type": "component_self_short",
-                        "component": comp_name,
-                        "component_type": graph.nodes[comp_name].get("instance_type", "Unknown"),
-                        "terminals": sorted(list(set(terminals_list))),
-                        "net": preferred_net_name,
-                        "canonical_net": canonical_net,
-                    }
-                )
+        # Only nets reached by more than one terminal of this component are shorts
+        shorted_nets = [(net, terminals) for net, terminals in net_to_terminals_map.items() if len(terminals) > 1]
+        if not shorted_nets:
+            continue
+
+        component_type = graph.nodes[comp_name].get("instance_type", "Unknown")
+        for canonical_net, terminals_list in shorted_nets:
+            preferred_net_name = get_preferred_net_name_for_reconstruction(canonical_net, dsu, allow_implicit_if_only_option=True)
+            detected_shorts.append(
+                {
+                    "type": "component_self_short",
+                    "component": comp_name,
+                    "component_type": component_type,
+                    # Terminals come from the keys of one connectivity map, so they are already unique
+                    "terminals": sorted(terminals_list),
+                    "net": preferred_net_name,
+                    "canonical_net": canonical_net,
+                }
+            )
 
     # 2. Check for global shorts between predefined important nets
-    key_nets_to_check = ["VDD", "GND", "VSS", "VCC"]
-    relevant_key_nets = [net for net in key_nets_to_check if net in dsu.parent]
-
-    for i in range(len(relevant_key_nets)):
-        for j in range(i + 1, len(relevant_key_nets)):
-            net1_raw = relevant_key_nets[i]
-            net2_raw = relevant_key_nets[j]
-            canonical_net1 = dsu.find(net1_raw)
-            canonical_net2 = dsu.find(net2_raw)
-            if canonical_net1 == canonical_net2:
-                detected_shorts.append(
-                    {
-                        "type": "global_short",
-                        "nets": sorted([net1_raw, net2_raw]),
-                        "canonical_net": canonical_net1,
-                    }
-                )
+    relevant_key_nets = [net for net in _KEY_NETS if net in dsu.parent]
+
+    # Bucket key nets by canonical net; every pair within a bucket is shorted together
+    canonical_to_key_nets = defaultdict(list)
+    for net_raw in relevant_key_nets:
+        canonical_to_key_nets[dsu.find(net_raw)].append(net_raw)
+
+    for canonical_net, shorted_key_nets in canonical_to_key_nets.items():
+        for net1_raw, net2_raw in combinations(shorted_key_nets, 2):
+            detected_shorts.append(
+                {
+                    "type": "global_short",
+                    "nets": sorted([net1_raw, net2_raw]),
+                    "canonical_net": canonical_net,
+                }
+            )
     return detected_shorts
 
 
+def _format_component_self_short(short):
+    """Format a component_self_short entry as a report line."""
+    return (
+        f"  - Component Short: '{short['component']}' (Type: {short['component_type']}) "
+        f"has terminals {short['terminals']} connected to the same net '{short['net']}' "
+        f"(canonical: '{short['canonical_net']}')."
+    )
+
+
+def _format_global_short(short):
+    """Format a global_short entry as a report line."""
+    return f"  - Global Short: Key nets {short['nets']} are connected together. (Canonical net: '{short['canonical_net']}')"
+
+
+def _format_unknown_short(short):
+    """Format an entry of unrecognized type as a report line."""
+    return f"  - Unknown short type: {short}"
+
+
+_SHORT_FORMATTERS = {
+    "component_self_short": _format_component_self_short,
+    "global_short": _format_global_short,
+}
+
+
 def format_short_circuit_report(detected_shorts):
     """
     Formats a list of detected short circuits into a human-readable string.
@@ -84,19 +126,8 @@ def format_short_circuit_report(detected_shorts):
     if not detected_shorts:
         return "No topological short circuits detected."
 
-    report_lines = ["Detected Topological Short Circuits:"]
-    for short in detected_shorts:
-        if short["type"] == "component_self_short":
-            report_lines.append(
-                f"  - Component Short: '{short['component']}' (Type: {short['component_type']}) "
-                f"has terminals {short['terminals']} connected to the same net '{short['net']}' "
-                f"(canonical: '{short['canonical_net']}')."
-            )
-        elif short["type"] == "global_short":
-            report_lines.append(
-                f"  - Global Short: Key nets {short['nets']} are connected together. "
-                f"(Canonical net: '{short['canonical_net']}')"
-            )
-        else:
-            report_lines.append(f"  - Unknown short type: {short}")
+    report_lines = [None] * (len(detected_shorts) + 1)
+    report_lines[0] = "Detected Topological Short Circuits:"
+    for i, short in enumerate(detected_shorts, 1):
+        report_lines[i] = _SHORT_FORMATTERS.get(short["type"], _format_unknown_short)(short)
     return "\n".join(report_lines)
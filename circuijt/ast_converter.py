@@ -1,7 +1,17 @@
 # -*- coding: utf-8 -*-
-"""AST conversion utilities."""
+"""AST conversion utilities.
 
-from .graph_utils import DSU
+Flattened statements are plain dicts, like every other AST statement:
+    declaration:    component_type, instance_name
+    pin_connection: component_instance, terminal, net
+    net_alias:      source_net, canonical_net
+"""
+
+from collections import defaultdict
+
+from .graph_utils import build_net_dsu
+
+__all__ = ["ast_to_flattened_ast", "flattened_ast_to_regular_ast", "iter_flattened_ast"]
 
 
 def _process_parallel_elements(elements):
@@ -11,127 +21,110 @@ def _process_parallel_elements(elements):
         if element["type"] == "component":
             processed.append({"type": "component_instance", "name": element["name"]})
         elif element["type"] in ("controlled_source", "noise_source"):
-            processed.append(
-                {
-                    "type": element["type"],
-                    **{k: element[k] for k in element if k != "type"},
-                }
-            )
+            processed.append(dict(element))
     return processed
 
 
+_SERIES_ELEMENT_HANDLERS = {
+    "parallel_block": lambda e: {
+        "type": "parallel_block",
+        "elements": _process_parallel_elements(e["elements"]),
+    },
+    "component": lambda e: {"type": "component_instance", "name": e["name"]},
+    "source": lambda e: {
+        "type": "voltage_source",
+        "name": e["name"],
+        "polarity": e["polarity"],
+    },
+    "named_current": lambda e: {
+        "type": "named_current",
+        "name": e["name"],
+        "direction": e["direction"],
+    },
+    "node": lambda e: {"type": "node", "name": e["name"]},
+}
+
+
 def _flatten_series_path(path_elements, _context):
     """Helper function to flatten series path elements."""
-    type_handlers = {
-        "parallel_block": lambda e: {
-            "type": "parallel_block",
-            "elements": _process_parallel_elements(e["elements"]),
-        },
-        "component": lambda e: {"type": "component_instance", "name": e["name"]},
-        "source": lambda e: {
-            "type": "voltage_source",
-            "name": e["name"],
-            "polarity": e["polarity"],
-        },
-        "named_current": lambda e: {
-            "type": "named_current",
-            "name": e["name"],
-            "direction": e["direction"],
-        },
-        "node": lambda e: {"type": "node", "name": e["name"]},
-    }
-
+    type_handlers = _SERIES_ELEMENT_HANDLERS
     return [type_handlers[e["type"]](e) for e in path_elements if e["type"] in type_handlers]
 
 
-def _find_adjacent_nodes(path, index):
-    """Find previous and next nodes in path relative to index."""
-    prev_node = next_node = None
-    for j in range(index - 1, -1, -1):
-        if path[j]["type"] == "node":
-            prev_node = path[j]["name"]
-            break
-    for j in range(index + 1, len(path)):
-        if path[j]["type"] == "node":
-            next_node = path[j]["name"]
-            break
-    return prev_node, next_node
+def _adjacent_node_arrays(path):
+    """Return, for each index of path, the names of the nearest nodes before and after it."""
+    prev_nodes = [None] * len(path)
+    next_nodes = [None] * len(path)
+    last = None
+    run_start = 0  # First index whose next node is still unknown
+    for i, element in enumerate(path):
+        prev_nodes[i] = last
+        if element["type"] == "node":
+            last = element["name"]
+            next_nodes[run_start:i] = [last] * (i - run_start)
+            run_start = i
+    return prev_nodes, next_nodes
 
 
-def _process_component_element(element, prev_node, next_node):
-    """Process a component element in series path."""
+def _pin_connection(component_instance, terminal, net):
+    """Build a single pin_connection statement."""
+    return {
+        "type": "pin_connection",
+        "component_instance": component_instance,
+        "terminal": terminal,
+        "net": net,
+    }
+
+
+def _emit_pins(component_name, first_term, second_term, prev_node, next_node):
+    """Build the pin connections of a two-terminal element between prev_node and next_node."""
     connections = []
     if prev_node:
-        connections.append(
-            {
-                "type": "pin_connection",
-                "component_instance": element["name"],
-                "terminal": "p1",
-                "net": prev_node,
-            }
-        )
+        connections.append(_pin_connection(component_name, first_term, prev_node))
     if next_node:
-        connections.append(
-            {
-                "type": "pin_connection",
-                "component_instance": element["name"],
-                "terminal": "p2",
-                "net": next_node,
-            }
-        )
+        connections.append(_pin_connection(component_name, second_term, next_node))
     return connections
 
 
+def _process_component_element(element, prev_node, next_node):
+    """Process a component element in series path."""
+    return _emit_pins(element["name"], "p1", "p2", prev_node, next_node)
+
+
+# Terminals a source presents to the previous and the next node of a series path
+_POLARITY_TERMINALS = {"-+": ("neg", "pos"), "+-": ("pos", "neg")}
+
+
 def _process_source_element(element, prev_node, next_node):
     """Process a source element in series path."""
-    connections = []
-    terminal_map = {"-+": ("neg", "pos"), "+-": ("pos", "neg")}
-    first_term, second_term = terminal_map[element["polarity"]]
-    if prev_node:
-        connections.append(
-            {
-                "type": "pin_connection",
-                "component_instance": element["name"],
-                "terminal": first_term,
-                "net": prev_node,
-            }
-        )
-    if next_node:
-        connections.append(
-            {
-                "type": "pin_connection",
-                "component_instance": element["name"],
-                "terminal": second_term,
-                "net": next_node,
-            }
-        )
-    return connections
+    first_term, second_term = _POLARITY_TERMINALS[element["polarity"]]
+    return _emit_pins(element["name"], first_term, second_term, prev_node, next_node)
 
 
 def _process_parallel_block(element, prev_node, next_node):
     """Process a parallel block element in series path."""
-    connections = []
-    for parallel_element in element["elements"]:
-        if parallel_element["type"] == "component":
-            if prev_node:
-                connections.append(
-                    {
-                        "type": "pin_connection",
-                        "component_instance": parallel_element["name"],
-                        "terminal": "p1",
-                        "net": prev_node,
-                    }
-                )
-            if next_node:
-                connections.append(
-                    {
-                        "type": "pin_connection",
-                        "component_instance": parallel_element["name"],
-                        "terminal": "p2",
-                        "net": next_node,
-                    }
-                )
-    return connections
+    names = [pe["name"] for pe in element["elements"] if pe["type"] == "component"]
+    # The prev/next checks are loop invariant, so pick the loop once; with both nodes
+    # present each component keeps its p1 pin directly before its p2 pin
+    if prev_node and next_node:
+        connections = []
+        for name in names:
+            connections.append(_pin_connection(name, "p1", prev_node))
+            connections.append(_pin_connection(name, "p2", next_node))
+        return connections
+    if prev_node:
+        return [_pin_connection(name, "p1", prev_node) for name in names]
+    if next_node:
+        return [_pin_connection(name, "p2", next_node) for name in names]
+    return []
+
+
+# Series path elements that contribute pin connections, keyed by element type
+_ELEMENT_PROCESSORS = {
+    "component": _process_component_element,
+    "source": _process_source_element,
+    "parallel_block": _process_parallel_block,
+}
 
 
 def _process_declaration(statement):
@@ -145,26 +138,19 @@ def _process_declaration(statement):
 
 def _process_component_connection_block(statement):
     """Process a component connection block."""
-    connections = []
-    for conn in statement["connections"]:
-        connections.append(
-            {
-                "type": "pin_connection",
-                "component_instance": statement["component_name"],
-                "terminal": conn["terminal"],
-                "net": conn["node"],
-            }
-        )
-    return connections
+    comp_name = statement["component_name"]
+    return [_pin_connection(comp_name, conn["terminal"], conn["node"]) for conn in statement["connections"]]
 
 
-def _process_series_connection(statement, dsu, element_processors):
+def _process_series_connection(statement, find_canonical):
     """Process a series connection statement."""
     flattened = []
     if "_invalid_start" not in statement:
-        for i, element in enumerate(statement["path"]):
+        path = statement["path"]
+        prev_nodes, next_nodes = _adjacent_node_arrays(path)
+        for i, element in enumerate(path):
             if element["type"] == "node":
-                canonical_net = dsu.find(element["name"])
+                canonical_net = find_canonical(element["name"])
                 if canonical_net != element["name"]:
                     flattened.append(
                         {
@@ -173,15 +159,14 @@ def _process_series_connection(statement, dsu, element_processors):
                             "canonical_net": canonical_net,
                         }
                     )
-            elif element["type"] in element_processors:
-                prev_node, next_node = _find_adjacent_nodes(statement["path"], i)
-                flattened.extend(element_processors[element["type"]](element, prev_node, next_node))
+            elif element["type"] in _ELEMENT_PROCESSORS:
+                flattened.extend(_ELEMENT_PROCESSORS[element["type"]](element, prev_nodes[i], next_nodes[i]))
     return flattened
 
 
-def _process_direct_assignment(statement, dsu):
+def _process_direct_assignment(statement, find_canonical):
     """Process a direct assignment statement."""
-    canonical = dsu.find(statement["target_node"])
+    canonical = find_canonical(statement["target_node"])
     if canonical != statement["source_node"]:
         return {
             "type": "net_alias",
@@ -191,34 +176,85 @@ def _process_direct_assignment(statement, dsu):
     return None
 
 
-def ast_to_flattened_ast(ast, dsu=None):
-    """Convert a parsed AST to a flattened format for analysis."""
-    if dsu is None:
-        dsu = DSU()
+def _memoized_find(dsu):
+    """Return a find function that resolves each net name through the DSU at most once."""
+    canonical_cache = {}
 
-    flattened = []
-    element_processors = {
-        "component": _process_component_element,
-        "source": _process_source_element,
-        "parallel_block": _process_parallel_block,
-    }
+    def find_canonical(net_name):
+        canonical_net = canonical_cache.get(net_name)
+        if canonical_net is None:
+            canonical_net = canonical_cache[net_name] = dsu.find(net_name)
+        return canonical_net
+
+    return find_canonical
+
+
+# Statements flattened without the DSU, keyed by statement type; series connections and
+# direct assignments need the canonical-net lookup and are dispatched inline
+_STATEMENT_PROCESSORS = {
+    "declaration": _process_declaration,
+    "component_connection_block": _process_component_connection_block,
+}
+
+_FLATTENED_STATEMENT_TYPES = frozenset({"declaration", "pin_connection", "net_alias"})
+
+
+def _passthrough_flattened(ast):
+    """Yield an already flattened AST; only declarations are rebuilt, to drop parser-only keys."""
+    for s in ast:
+        yield _process_declaration(s) if s["type"] == "declaration" else s
 
-    statement_processors = {
-        "declaration": _process_declaration,
-        "component_connection_block": _process_component_connection_block,
-        "series_connection": lambda s: _process_series_connection(s, dsu, element_processors),
-        "direct_assignment": lambda s: _process_direct_assignment(s, dsu),
-    }
 
+def iter_flattened_ast(ast, dsu=None):
+    """Yield the flattened statements of a parsed AST one at a time.
+
+    If no DSU is given, one is built with ``graph_utils.build_net_dsu``, which resolves
+    nets exactly as the DSU from ``graph_utils.ast_to_graph`` would, so neither the caller
+    nor this function has to build a graph just to obtain it.
+
+    An AST that is already flattened (only declarations, pin connections and net
+    aliases) is passed through without building a graph; ``dsu`` is ignored for such
+    input, and its pin connection and net alias dicts are shared with the input, not copied.
+
+    ``ast`` may be any iterable; one that is not a list is read into one first, since
+    the statements are scanned more than once.
+    """
+    if not isinstance(ast, list):
+        ast = list(ast)
+    if all(s["type"] in _FLATTENED_STATEMENT_TYPES for s in ast):
+        yield from _passthrough_flattened(ast)
+        return
+
+    if dsu is None:
+        dsu = build_net_dsu(ast)
+    find_canonical = _memoized_find(dsu)
+
+    get_processor = _STATEMENT_PROCESSORS.get
     for statement in ast:
-        if statement["type"] in statement_processors:
-            result = statement_processors[statement["type"]](statement)
-            if isinstance(result, list):
-                flattened.extend(result)
-            elif result is not None:
-                flattened.append(result)
+        stmt_type = statement["type"]
+        if stmt_type == "series_connection":
+            yield from _process_series_connection(statement, find_canonical)
+        elif stmt_type == "direct_assignment":
+            alias = _process_direct_assignment(statement, find_canonical)
+            if alias is not None:
+                yield alias
+        else:
+            processor = get_processor(stmt_type)
+            if processor is not None:
+                result = processor(statement)
+                if isinstance(result, list):
+                    yield from result
+                else:
+                    yield result
 
-    return flattened
+
+def ast_to_flattened_ast(ast, dsu=None):
+    """Convert a parsed AST to a flattened format for analysis.
+
+    Returns the statements of ``iter_flattened_ast`` as a list; consumers that only
+    iterate once can use the generator directly and skip materializing it.
+    """
+    return list(iter_flattened_ast(ast, dsu))
 
 
 def _process_parallel_node_elements(elements):
@@ -228,50 +264,53 @@ def _process_parallel_node_elements(elements):
         if element["type"] == "component_instance":
             processed.append({"type": "component", "name": element["name"]})
         elif element["type"] in ("controlled_source", "noise_source"):
-            processed.append(
-                {
-                    "type": element["type"],
-                    **{k: element[k] for k in element if k != "type"},
-                }
-            )
+            processed.append(dict(element))
     return processed
 
 
+_REGULAR_ELEMENT_HANDLERS = {
+    "node": lambda e: {"type": "node", "name": e["name"]},
+    "component_instance": lambda e: {"type": "component", "name": e["name"]},
+    "voltage_source": lambda e: {
+        "type": "source",
+        "name": e["name"],
+        "polarity": e["polarity"],
+    },
+    "named_current": lambda e: {
+        "type": "named_current",
+        "name": e["name"],
+        "direction": e["direction"],
+    },
+    "parallel_block": lambda e: {
+        "type": "parallel_block",
+        "elements": _process_parallel_node_elements(e["elements"]),
+    },
+}
+
+
 def _create_node_elements(elements):
     """Helper function to create node elements for regular AST."""
-    type_handlers = {
-        "node": lambda e: {"type": "node", "name": e["name"]},
-        "component_instance": lambda e: {"type": "component", "name": e["name"]},
-        "voltage_source": lambda e: {
-            "type": "source",
-            "name": e["name"],
-            "polarity": e["polarity"],
-        },
-        "named_current": lambda e: {
-            "type": "named_current",
-            "name": e["name"],
-            "direction": e["direction"],
-        },
-        "parallel_block": lambda e: {
-            "type": "parallel_block",
-            "elements": _process_parallel_node_elements(e["elements"]),
-        },
-    }
-
+    type_handlers = _REGULAR_ELEMENT_HANDLERS
     return [type_handlers[e["type"]](e) for e in elements if e["type"] in type_handlers]
 
 
-def _find_net_pairs(pin_connections):
-    """Find all unique net pairs connected by components."""
-    net_pairs = set()
-    for pin in pin_connections:
-        for other_pin in pin_connections:
-            if pin["component_instance"] == other_pin["component_instance"] and pin["terminal"] != other_pin["terminal"]:
-                net_pairs.add(tuple(sorted((pin["net"], other_pin["net"]))))
-    return net_pairs
+def _group_components_by_net_pair(pins, component_terminals):
+    """Group components by the sorted pair of nets joined by two of their terminals.
+
+    A component is listed once for each of its pins on the lower net of the pair that has
+    another terminal on the higher net, in pin order; a component bridging the pair through
+    several terminals therefore appears several times, as a parallel block with itself.
+    """
+    net_pair_to_components = defaultdict(list)
+    for comp, term1, net1 in pins:
+        # Other terminals of this pin's component, skipping pairs whose sorted order starts at the other net
+        partner_nets = dict.fromkeys(net2 for term2, net2 in component_terminals[comp] if term2 != term1 and net1 <= net2)
+        for net2 in partner_nets:
+            net_pair_to_components[(net1, net2)].append(comp)
+    return net_pair_to_components
 
 
-def _build_ast_path(net1, net2, components, _node_components, _pin_connections):
+def _build_ast_path(net1, net2, components):
     """Build AST path segment between two nets."""
     if len(components) > 1:
         return {
@@ -300,82 +339,30 @@ def _build_ast_path(net1, net2, components, _node_components, _pin_connections):
 def flattened_ast_to_regular_ast(flattened_ast):
     """Convert a flattened AST back to regular format."""
     regular_ast = []
+    append = regular_ast.append
+
+    # One pass: declarations go straight out, pins are kept in order and bucketed per component
+    pins = []
+    component_terminals = defaultdict(list)
+    for statement in flattened_ast:
+        stmt_type = statement["type"]
+        # Pins outnumber declarations (two or more per component), so test for them first
+        if stmt_type == "pin_connection":
+            comp, term, net = statement["component_instance"], statement["terminal"], statement["net"]
+            pins.append((comp, term, net))
+            component_terminals[comp].append((term, net))
+        elif stmt_type == "declaration":
+            append(
+                {
+                    "type": "declaration",
+                    "component_type": statement["component_type"],
+                    "instance_name": statement["instance_name"],
+                }
+            )
 
-    # Process declarations
-    regular_ast.extend(
-        {
-            "type": "declaration",
-            "component_type": d["component_type"],
-            "instance_name": d["instance_name"],
-        }
-        for d in flattened_ast
-        if d["type"] == "declaration"
-    )
-
-    # Group pin connections by nodes
-    pin_connections = [s for s in flattened_ast if s["type"] == "pin_connection"]
-    node_components = {}
-    for pin in pin_connections:
-        node_components.setdefault(pin["net"], []).append((pin["component_instance"], pin["terminal"]))
-
-    # Process net pairs
-    net_pairs = _find_net_pairs(pin_connections)
-    for net1, net2 in net_pairs:
-        components = [
-            comp
-            for comp, term in node_components.get(net1, [])
-            if any(p["component_instance"] == comp and p["net"] == net2 for p in pin_connections if p["terminal"] != term)
-        ]
-
-        if path := _build_ast_path(net1, net2, components, node_components, pin_connections):
-            regular_ast.append(path)
+    # Group components by the net pair they bridge; buckets with several members are parallel
+    for (net1, net2), components in _group_components_by_net_pair(pins, component_terminals).items():
+        if path := _build_ast_path(net1, net2, components):
+            append(path)
 
     return regular_ast
-
-
-def _process_component_connection(statement, edges):
-    """Process component connection block statements."""
-    for conn in statement["connections"]:
-        edges.append(
-            {
-                "type": "edge",
-                "source": conn["node"],
-                "target": statement["component_name"],
-                "terminal": conn["terminal"],
-            }
-        )
-
-
-def _process_series_connection_element(element, prev_node, next_node):
-    """Process an element within a series connection."""
-    if element["type"] == "component":
-        return _process_component_element(element, prev_node, next_node)
-    if element["type"] == "source":
-        return _process_source_element(element, prev_node, next_node)
-    if element["type"] == "parallel_block":
-        return _process_parallel_block(element, prev_node, next_node)
-    return []
-
-
-def ast_to_graph(parsed_statements, dsu_structure=None, debug=False):  # pylint: disable=unused-argument
-    """Convert AST to a graph representation."""
-    dsu = DSU()
-
-    # First pass - process declarations and build DSU structure
-    for statement in parsed_statements:
-        if statement["type"] == "declaration":
-            dsu.add_set(statement["instance_name"])
-
-    # Second pass - process connections and build graph edges
-    edges = []
-    for statement in parsed_statements:
-        if statement["type"] == "component_connection_block":
-            _process_component_connection(statement, edges)
-        elif statement["type"] == "series_connection":
-            for i, element in enumerate(statement["path"]):
-                if element["type"] == "node":
-                    continue
-                prev_node, next_node = _find_adjacent_nodes(statement["path"], i)
-                edges.extend(_process_series_connection_element(element, prev_node, next_node))
-
-    return {"nodes": dsu.get_all_canonical_representatives(), "edges": edges}
@@ -1,137 +1,140 @@
 # -*- coding: utf-8 -*-
 """AST utility functions for circuit analysis."""
 
-
-def _handle_declaration(stmt, declared_component_instances, component_counts):
+import functools
+
+# The converters live in ast_converter; re-exported here so older imports get the real implementations
+from .ast_converter import ast_to_flattened_ast, flattened_ast_to_regular_ast  # noqa: F401
+
+# Component types tallied in the summary, mapped to their count key
+_COMPONENT_COUNT_KEYS = {
+    "Nmos": "total_nmos",
+    "R": "total_resistors",
+    "C": "total_capacitors",
+    "V": "total_voltages",
+}
+# Every count reported by the summary, in output order
+_SUMMARY_COUNT_KEYS = (*_COMPONENT_COUNT_KEYS.values(), "total_parallel_blocks")
+
+
+class _SummaryState:
+    """Mutable accumulators threaded through the summary statement handlers."""
+
+    __slots__ = (
+        "explicit_nodes",
+        "terminal_refs",
+        "declared_component_instances",
+        "implicit_node_counter",
+        "component_counts",
+    )
+
+    def __init__(self):
+        self.explicit_nodes = set()
+        self.terminal_refs = set()  # (component, terminal) pairs, formatted as "component.terminal" at the end
+        self.declared_component_instances = set()  # Store names of declared components
+        self.implicit_node_counter = 0
+        self.component_counts = dict.fromkeys(_SUMMARY_COUNT_KEYS, 0)
+
+
+def _handle_declaration(stmt, state):
     inst_name = stmt.get("instance_name")
-    comp_type = stmt.get("component_type")
     if inst_name:  # Parser ensures format, validator checks for duplicates/type
-        declared_component_instances.add(inst_name)
-        if comp_type == "Nmos":
-            component_counts["total_nmos"] += 1
-        elif comp_type == "R":
-            component_counts["total_resistors"] += 1
-        elif comp_type == "C":
-            component_counts["total_capacitors"] += 1
-        elif comp_type == "V":
-            component_counts["total_voltages"] += 1
-
-
-def _handle_component_connection(stmt, explicit_nodes):
-    comp_name = stmt.get("component_name")  # Assumed declared by validator
-    for conn in stmt.get("connections", []):
-        if conn.get("node"):
-            explicit_nodes.add(conn["node"])
-        if comp_name and conn.get("terminal"):  # comp_name validity checked by validator
-            explicit_nodes.add(f"{comp_name}.{conn['terminal']}")
-
+        state.declared_component_instances.add(inst_name)
+        count_key = _COMPONENT_COUNT_KEYS.get(stmt.get("component_type"))
+        if count_key:
+            state.component_counts[count_key] += 1
 
-def _handle_direct_assignment(stmt, explicit_nodes):
-    if stmt.get("source_node"):
-        explicit_nodes.add(stmt["source_node"])
-    if stmt.get("target_node"):
-        explicit_nodes.add(stmt["target_node"])
 
+def _handle_component_connection(stmt, state):
+    explicit_nodes = state.explicit_nodes
+    terminal_refs = state.terminal_refs
+    comp_name = stmt.get("component_name")  # Assumed declared by validator
+    for conn in stmt.get("connections", []):
+        node = conn.get("node")
+        if node:
+            explicit_nodes.add(node)
+        terminal = conn.get("terminal")
+        if comp_name and terminal:  # comp_name validity checked by validator
+            terminal_refs.add((comp_name, terminal))
 
-def _generate_implicit_nodes(structural_path_elements, implicit_node_counter):
-    implicit_nodes_generated = set()
-
-    # Implicit node at the end if needed
-    last_el_in_structural_path = structural_path_elements[-1]
-    if last_el_in_structural_path.get("type") not in ["node"]:
-        implicit_node_counter += 1
-        implicit_nodes_generated.add(f"_implicit_node_{implicit_node_counter}")
 
-    # Implicit nodes between structural elements if neither is a node
-    for i in range(len(structural_path_elements) - 1):
-        el_current = structural_path_elements[i]
-        el_next = structural_path_elements[i + 1]
+def _handle_direct_assignment(stmt, state):
+    source_node = stmt.get("source_node")
+    if source_node:
+        state.explicit_nodes.add(source_node)
+    target_node = stmt.get("target_node")
+    if target_node:
+        state.explicit_nodes.add(target_node)
 
-        if el_current.get("type") not in ["node"] and el_next.get("type") not in ["node"]:
-            implicit_node_counter += 1
-            implicit_nodes_generated.add(f"_implicit_node_{implicit_node_counter}")
 
-    return implicit_nodes_generated, implicit_node_counter
+# Series path elements that take part in implicit node generation
+_STRUCTURAL_TYPES = frozenset({"node", "component", "source", "parallel_block"})
 
 
-def _handle_series_connection(
-    stmt,
-    explicit_nodes,
-    implicit_nodes_generated,
-    implicit_node_counter,
-    component_counts,
-):
+def _handle_series_connection(stmt, state):
+    """Record one series path's explicit nodes, parallel blocks and implicit node count in state."""
     if stmt.get("_invalid_start"):  # Path structure compromised, skip for implicit node analysis
         return
 
-    structural_path_elements = []
+    explicit_nodes = state.explicit_nodes
+    implicit_node_counter = state.implicit_node_counter
+    # One walk over the path collects explicit nodes and parallel blocks, and counts an implicit
+    # node between every two consecutive structural elements of which neither is a node
+    prev_type = None  # Type of the previous structural element
     for el in stmt.get("path", []):
         el_type = el.get("type")
-        if el_type in ["node", "component", "source", "parallel_block"]:
-            structural_path_elements.append(el)
-
-    if not structural_path_elements:
-        return
-
-    # Add explicit nodes from this path
-    for el in structural_path_elements:
-        if el.get("type") == "node" and el.get("name"):
-            explicit_nodes.add(el["name"])
+        if el_type not in _STRUCTURAL_TYPES:
+            continue
+        if el_type == "node":
+            name = el.get("name")
+            if name:
+                explicit_nodes.add(name)
+        else:
+            if el_type == "parallel_block":
+                state.component_counts["total_parallel_blocks"] += 1
+            if prev_type is not None and prev_type != "node":
+                implicit_node_counter += 1
+        prev_type = el_type
+
+    # Implicit node at the end if the path does not end on a node
+    if prev_type is not None and prev_type != "node":
+        implicit_node_counter += 1
+    state.implicit_node_counter = implicit_node_counter
 
-    # --- Implicit Node Generation for this series path ---
-    implicit_nodes_generated, implicit_node_counter = _generate_implicit_nodes(structural_path_elements, implicit_node_counter)
 
-    for el in stmt.get("path", []):
-        if el.get("type") == "parallel_block":
-            component_counts["total_parallel_blocks"] += 1
+# Summary handlers keyed by statement type; other statement types do not contribute
+_SUMMARY_HANDLERS = {
+    "declaration": _handle_declaration,
+    "component_connection_block": _handle_component_connection,
+    "direct_assignment": _handle_direct_assignment,
+    "series_connection": _handle_series_connection,
+}
 
 
 def summarize_circuit_elements(parsed_statements):
-    explicit_nodes = set()
-    declared_component_instances = set()  # Store names of declared components
-    implicit_nodes_generated = set()
-    implicit_node_counter = 0
-    component_counts = {
-        "total_nmos": 0,
-        "total_resistors": 0,
-        "total_capacitors": 0,
-        "total_voltages": 0,
-        "total_parallel_blocks": 0,
-    }
-
+    state = _SummaryState()
+    get_handler = _SUMMARY_HANDLERS.get
     for stmt in parsed_statements:
-        stmt_type = stmt.get("type")
-
-        if stmt_type == "declaration":
-            _handle_declaration(stmt, declared_component_instances, component_counts)
-
-        elif stmt_type == "component_connection_block":
-            _handle_component_connection(stmt, explicit_nodes)
-
-        elif stmt_type == "direct_assignment":
-            _handle_direct_assignment(stmt, explicit_nodes)
-
-        elif stmt_type == "series_connection":
-            _handle_series_connection(
-                stmt,
-                explicit_nodes,
-                implicit_nodes_generated,
-                implicit_node_counter,
-                component_counts,
-            )
-
+        handler = get_handler(stmt.get("type"))
+        if handler is not None:
+            handler(stmt, state)
+
+    explicit_nodes = state.explicit_nodes.union([f"{comp}.{terminal}" for comp, terminal in state.terminal_refs])
+    # Implicit nodes are numbered 1..counter, so their names are only formatted here
+    implicit_nodes_generated = [f"_implicit_node_{i}" for i in range(1, state.implicit_node_counter + 1)]
+    declared_component_instances = state.declared_component_instances
     all_nodes_combined = explicit_nodes.union(implicit_nodes_generated)
 
     return {
         "num_total_nodes": len(all_nodes_combined),
-        "node_list": sorted(list(all_nodes_combined)),
+        "node_list": sorted(all_nodes_combined),
         "total_components": len(declared_component_instances),
-        "component_list": sorted(list(declared_component_instances)),
+        "component_list": sorted(declared_component_instances),
         "details": {
-            "explicit_nodes": sorted(list(explicit_nodes)),
-            "implicit_nodes": sorted(list(implicit_nodes_generated)),
+            "explicit_nodes": sorted(explicit_nodes),
+            "implicit_nodes": sorted(implicit_nodes_generated),
         },
-        **component_counts,
+        **state.component_counts,
     }
 
 
@@ -159,6 +162,12 @@ def _process_parallel_block(block_elements, component_map, node_map, current_nod
             node_map.add(error_id)
 
 
+# Bound separators of the proto syntax, looked up once instead of per formatted statement
+_join_terminal_assignments = ", ".join
+_join_path_items = " -- ".join
+_join_parallel_elements = " || ".join
+
+
 def _proto_handle_declaration(stmt):
     """Handle declaration statement type for proto generation."""
     return f"{stmt['component_type']} {stmt['instance_name']}"
@@ -166,8 +175,9 @@ def _proto_handle_declaration(stmt):
 
 def _proto_handle_component_connection_block(stmt):
     """Handle component connection block statement type for proto generation."""
-    assignments = [f"{conn['terminal']}:({conn['node']})" for conn in stmt.get("connections", [])]
-    return f"{stmt['component_name']} {{ {', '.join(assignments)} }}"
+    connections = stmt.get("connections", [])
+    assignments = _join_terminal_assignments([f"{conn['terminal']}:({conn['node']})" for conn in connections])
+    return f"{stmt['component_name']} {{ {assignments} }}"
 
 
 def _proto_handle_direct_assignment(stmt):
@@ -177,42 +187,45 @@ def _proto_handle_direct_assignment(stmt):
 
 def _proto_handle_series_connection(stmt):
     """Handle series connection statement type for proto generation."""
-    path_parts = []
-    for item in stmt.get("path", []):
-        item_type = item.get("type")
-        if item_type == "node":
-            path_parts.append(f"({item['name']})")
-        elif item_type == "component":
-            path_parts.append(item["name"])
-        elif item_type == "source":
-            path_parts.append(f"{item['name']} ({item['polarity']})")
-        elif item_type == "named_current":
-            path_parts.append(f"{item['direction']}{item['name']}")
-        elif item_type == "parallel_block":
-            path_parts.append(_proto_handle_parallel_block(item))
-        elif item_type == "error":
-            path_parts.append(f"<ERROR_IN_PATH: {item.get('message', 'Malformed element')}>")
-        else:
-            path_parts.append(f"<UNKNOWN_PATH_TYPE: {item_type}>")
-    return " -- ".join(path_parts)
+    get_formatter = _PATH_ITEM_FORMATTERS.get
+    path = stmt.get("path", [])
+    return _join_path_items([get_formatter(item.get("type"), _proto_format_unknown_path_item)(item) for item in path])
 
 
 def _proto_handle_parallel_block(item):
     """Handle parallel block elements for proto generation."""
-    elements_strs = []
-    for pel in item.get("elements", []):
-        pel_type = pel.get("type")
-        if pel_type == "component":
-            elements_strs.append(pel["name"])
-        elif pel_type == "controlled_source":
-            elements_strs.append(f"{pel['expression']} ({pel['direction']})")
-        elif pel_type == "noise_source":
-            elements_strs.append(f"{pel['id']} ({pel['direction']})")
-        elif pel_type == "error":
-            elements_strs.append(f"<ERROR_IN_PARALLEL: {pel.get('message', 'Malformed element')}>")
-        else:
-            elements_strs.append(f"<UNKNOWN_PARALLEL_TYPE: {pel_type}>")
-    return f"[ {' || '.join(elements_strs)} ]"
+    get_formatter = _PARALLEL_ELEMENT_FORMATTERS.get
+    elements_strs = [
+        get_formatter(pel.get("type"), _proto_format_unknown_parallel_element)(pel) for pel in item.get("elements", [])
+    ]
+    return f"[ {_join_parallel_elements(elements_strs)} ]"
+
+
+def _proto_format_unknown_path_item(item):
+    """Format a series path item of unknown type."""
+    return f"<UNKNOWN_PATH_TYPE: {item.get('type')}>"
+
+
+def _proto_format_unknown_parallel_element(pel):
+    """Format a parallel block element of unknown type."""
+    return f"<UNKNOWN_PARALLEL_TYPE: {pel.get('type')}>"
+
+
+_PATH_ITEM_FORMATTERS = {
+    "node": lambda item: f"({item['name']})",
+    "component": lambda item: item["name"],
+    "source": lambda item: f"{item['name']} ({item['polarity']})",
+    "named_current": lambda item: f"{item['direction']}{item['name']}",
+    "parallel_block": _proto_handle_parallel_block,
+    "error": lambda item: f"<ERROR_IN_PATH: {item.get('message', 'Malformed element')}>",
+}
+
+_PARALLEL_ELEMENT_FORMATTERS = {
+    "component": lambda pel: pel["name"],
+    "controlled_source": lambda pel: f"{pel['expression']} ({pel['direction']})",
+    "noise_source": lambda pel: f"{pel['id']} ({pel['direction']})",
+    "error": lambda pel: f"<ERROR_IN_PARALLEL: {pel.get('message', 'Malformed element')}>",
+}
 
 
 def _proto_handle_error(stmt):
@@ -227,6 +240,15 @@ def _proto_handle_unknown(stmt):
     return f"; UNKNOWN_AST_STATEMENT_TYPE: {stmt.get('type')} - DATA: {stmt}"
 
 
+_PROTO_HANDLERS = {
+    "declaration": _proto_handle_declaration,
+    "component_connection_block": _proto_handle_component_connection_block,
+    "direct_assignment": _proto_handle_direct_assignment,
+    "series_connection": _proto_handle_series_connection,
+    "error": _proto_handle_error,
+}
+
+
 def generate_proto_from_ast(parsed_statements):
     """
     Generates a Proto-Language circuit description string from its AST.
@@ -238,57 +260,166 @@ def generate_proto_from_ast(parsed_statements):
     Returns:
         str: A string representing the reconstructed circuit description.
     """
-    handlers = {
-        "declaration": _proto_handle_declaration,
-        "component_connection_block": _proto_handle_component_connection_block,
-        "direct_assignment": _proto_handle_direct_assignment,
-        "series_connection": _proto_handle_series_connection,
-        "error": _proto_handle_error,
-    }
+    get_handler = _PROTO_HANDLERS.get
+    lines = [get_handler(stmt.get("type"), _proto_handle_unknown)(stmt) for stmt in parsed_statements]
+    return "\n".join(filter(None, lines))  # Handlers may return empty lines, which are dropped
 
-    output_lines = []
+
+def write_proto_from_ast(parsed_statements, stream):
+    """
+    Writes the Proto-Language description of an AST to a text stream, line by line.
+
+    The text written is exactly what generate_proto_from_ast returns, but neither the
+    formatted lines nor the whole description are ever held in memory at once.
+
+    Args:
+        parsed_statements (iterable): AST statement dictionaries.
+        stream: A writable text stream, such as an open file or io.StringIO.
+    """
+    get_handler = _PROTO_HANDLERS.get
+    write = stream.write
+    separator = ""  # No newline before the first line, matching "\n".join
     for stmt in parsed_statements:
-        stmt_type = stmt.get("type")
-        handler = handlers.get(stmt_type, _proto_handle_unknown)
-        line_str = handler(stmt)
+        line_str = get_handler(stmt.get("type"), _proto_handle_unknown)(stmt)
         if line_str:
-            output_lines.append(line_str)
+            write(separator)
+            write(line_str)
+            separator = "\n"
+
+
+def _emit_series_path(resolved_path):
+    """Format a series path whose items were paired with their formatters in advance."""
+    return _join_path_items([formatter(item) for formatter, item in resolved_path])
+
+
+def compile_proto_emitter(parsed_statements):
+    """Resolve the proto formatting of an AST once, for ASTs that are serialized repeatedly.
+
+    Each statement and series path item is bound to its formatter up front, so calling the
+    returned emitter skips all type dispatch. Fields are still read at emit time: in-place
+    edits to statement values show up in later output, but statements added or removed, or
+    element types changed, after compiling do not.
 
-    return "\n".join(output_lines)
+    Args:
+        parsed_statements (iterable): AST statement dictionaries
+
+    Returns:
+        callable: A function of no arguments returning what generate_proto_from_ast would
+    """
+    get_handler = _PROTO_HANDLERS.get
+    get_formatter = _PATH_ITEM_FORMATTERS.get
+    steps = []
+    for stmt in parsed_statements:
+        if stmt.get("type") == "series_connection":
+            resolved_path = tuple(
+                (get_formatter(item.get("type"), _proto_format_unknown_path_item), item) for item in stmt.get("path", [])
+            )
+            steps.append(functools.partial(_emit_series_path, resolved_path))
+        else:
+            steps.append(functools.partial(get_handler(stmt.get("type"), _proto_handle_unknown), stmt))
+    steps = tuple(steps)
+
+    def emit():
+        return "\n".join(filter(None, [step() for step in steps]))
+
+    return emit
+
+
+# Element types that can appear inside a series path; other types are only searched at the top level
+_PATH_ELEMENT_TYPES = frozenset(
+    {"node", "component", "source", "parallel_block", "named_current", "controlled_source", "noise_source", "error"}
+)
+
+
+def iter_statements_of_type(statements, statement_type):
+    """Lazily yield the statements of a specific type in the AST.
+
+    Args:
+        statements (iterable): AST statement dictionaries
+        statement_type (str): Type of statement to find
+
+    Yields:
+        dict: Matching statements, including elements nested in series connection paths
+    """
+    if statement_type not in _PATH_ELEMENT_TYPES:  # Nothing to find inside series paths
+        for stmt in statements:
+            if stmt.get("type") == statement_type:
+                yield stmt
+        return
+
+    for stmt in statements:
+        stmt_type = stmt.get("type")
+        if stmt_type == statement_type:
+            yield stmt
+        # Check for nested statements in series connections
+        elif stmt_type == "series_connection":
+            for path_element in stmt.get("path") or ():
+                if path_element.get("type") == statement_type:
+                    yield path_element
+
+
+class ASTIndex:  # pylint: disable=too-few-public-methods
+    """Statements of an AST grouped by type, for answering repeated find queries without rescanning."""
+
+    __slots__ = ("by_type", "declarations_by_component_type")
+
+    def __init__(self):
+        self.by_type = {}  # Type -> matching statements and series path elements, in AST order
+        self.declarations_by_component_type = {}  # Component type -> declaration statements
+
+
+def build_ast_index(statements):
+    """Index an AST in one pass so find_statements_of_type and find_declarations_by_type can reuse it.
+
+    Args:
+        statements (iterable): AST statement dictionaries
+
+    Returns:
+        ASTIndex: The index; it does not track later changes to the statements
+    """
+    index = ASTIndex()
+    by_type = index.by_type
+    declarations = index.declarations_by_component_type
+    for stmt in statements:
+        stmt_type = stmt.get("type")
+        by_type.setdefault(stmt_type, []).append(stmt)
+        if stmt_type == "declaration":
+            declarations.setdefault(stmt.get("component_type"), []).append(stmt)
+        elif stmt_type == "series_connection":
+            for path_element in stmt.get("path") or ():
+                element_type = path_element.get("type")
+                if element_type != "series_connection":  # Matches iter_statements_of_type
+                    by_type.setdefault(element_type, []).append(path_element)
+    return index
 
 
 def find_statements_of_type(statements, statement_type):
     """Find all statements of a specific type in the AST.
 
     Args:
-        statements (list): List of AST statement dictionaries
+        statements (list or ASTIndex): List of AST statement dictionaries, or an index of them
         statement_type (str): Type of statement to find
 
     Returns:
         list: List of matching statements
     """
-    matches = []
-    for stmt in statements:
-        if stmt.get("type") == statement_type:
-            matches.append(stmt)
-        # Check for nested statements in series connections
-        elif stmt.get("type") == "series_connection":
-            for path_element in stmt.get("path", []):
-                if path_element.get("type") == statement_type:
-                    matches.append(path_element)
-    return matches
+    if isinstance(statements, ASTIndex):
+        return list(statements.by_type.get(statement_type, ()))
+    return list(iter_statements_of_type(statements, statement_type))
 
 
 def find_declarations_by_type(statements, component_type):
     """Find all component declarations of a specific type.
 
     Args:
-        statements (list): List of AST statement dictionaries
+        statements (list or ASTIndex): List of AST statement dictionaries, or an index of them
         component_type (str): Type of component to find declarations for
 
     Returns:
         list: List of matching declaration statements
     """
+    if isinstance(statements, ASTIndex):
+        return list(statements.declarations_by_component_type.get(component_type, ()))
     return [stmt for stmt in statements if stmt.get("type") == "declaration" and stmt.get("component_type") == component_type]
 
 
@@ -313,41 +444,4 @@ def _flatten_series_path_element(
     Returns:
         str: The flattened representation of the series path element.
     """
-    element_type = element.get("type")
-
-    if element_type == "node":
-        return f"({element['name']})"
-
-    elif element_type == "component":
-        return element["name"]
-
-    elif element_type == "source":
-        return f"{element['name']} ({element['polarity']})"
-
-    elif element_type == "named_current":
-        return f"{element['direction']}{element['name']}"
-
-    elif element_type == "parallel_block":
-        return _proto_handle_parallel_block(element)
-
-    elif element_type == "error":
-        return f"<ERROR_IN_PATH: {element.get('message', 'Malformed element')}>"
-
-    else:
-        return f"<UNKNOWN_PATH_TYPE: {element_type}>"
-
-
-def ast_to_flattened_ast(parsed_statements, dsu, component_map=None):  # pylint: disable=unused-argument
-    """
-    Converts a parsed AST to a "flattened" AST where all connections are explicit
-    and nodes are canonicalized using the DSU structure.
-    This is a step towards generating a graph or a canonical netlist.
-    """
-    return []  # Placeholder, actual implementation needed
-
-
-def flattened_ast_to_regular_ast(flattened_ast_statements):
-    """Converts a flattened AST back to a regular AST structure (if possible/needed)."""
-    # This function might be complex depending on how different the flattened AST is.
-    # For now, let's assume it's a direct pass-through or simple transformation.
-    return flattened_ast_statements
+    return _PATH_ITEM_FORMATTERS.get(element.get("type"), _proto_format_unknown_path_item)(element)
@@ -1,36 +1,46 @@
 # -*- coding: utf-8 -*-
 """Database of components and their properties."""
 
+from types import MappingProxyType
+
+# Database of components and their properties, shared read-only by every ComponentDatabase
+_COMPONENTS = {
+    "R": {"arity": 2},  # Resistor
+    "C": {"arity": 2},  # Capacitor
+    "L": {"arity": 2},  # Inductor
+    "Nmos": {"arity": 4, "terminals": ["G", "D", "S", "B"]},
+    "Pmos": {"arity": 4, "terminals": ["G", "D", "S", "B"]},
+    "V": {"arity": 2, "terminals": ["pos", "neg"]},
+    "I": {"arity": 2, "terminals": ["pos", "neg"]},
+    "Opamp": {
+        "arity": 3,
+        "terminals": ["IN+", "IN-", "OUT"],
+    },  # Basic, could be 5
+    # Behavioral / Internal types used by transformations or advanced features
+    "controlled_source": {
+        "arity": 2,
+        "behavioral": True,
+        "terminals": ["par_t1", "par_t2"],
+    },
+    "noise_source": {
+        "arity": 2,
+        "behavioral": True,
+        "terminals": ["par_t1", "par_t2"],
+    },
+}
+_COMPONENTS_VIEW = MappingProxyType(_COMPONENTS)
+# Flat type -> arity table so get_arity is a single lookup
+_ARITY = MappingProxyType({comp_type: props["arity"] for comp_type, props in _COMPONENTS.items()})
+
 
 class ComponentDatabase:  # pylint: disable=too-few-public-methods
     """Manages the database of known circuit components and their properties."""
 
+    __slots__ = ("components", "_arity")
+
     def __init__(self):
-        # Define the database of components and their properties
-        self.components = {
-            "R": {"arity": 2},  # Resistor
-            "C": {"arity": 2},  # Capacitor
-            "L": {"arity": 2},  # Inductor
-            "Nmos": {"arity": 4, "terminals": ["G", "D", "S", "B"]},
-            "Pmos": {"arity": 4, "terminals": ["G", "D", "S", "B"]},
-            "V": {"arity": 2, "terminals": ["pos", "neg"]},
-            "I": {"arity": 2, "terminals": ["pos", "neg"]},
-            "Opamp": {
-                "arity": 3,
-                "terminals": ["IN+", "IN-", "OUT"],
-            },  # Basic, could be 5
-            # Behavioral / Internal types used by transformations or advanced features
-            "controlled_source": {
-                "arity": 2,
-                "behavioral": True,
-                "terminals": ["par_t1", "par_t2"],
-            },
-            "noise_source": {
-                "arity": 2,
-                "behavioral": True,
-                "terminals": ["par_t1", "par_t2"],
-            },
-        }
+        self.components = _COMPONENTS_VIEW
+        self._arity = _ARITY
 
     def get_arity(self, component_type):
         """Get the arity of a component type.
@@ -41,7 +51,11 @@ class ComponentDatabase:  # pylint: disable=too-few-public-methods
         Returns:
             int: The arity of the component, or None if the component is not found.
         """
-        return self.components.get(component_type, {}).get("arity")
+        return self._arity.get(component_type)
+
+
+# Shared instance for callers that only read the built-in component table
+DEFAULT_COMPONENT_DB = ComponentDatabase()
 
 
 # Example usage
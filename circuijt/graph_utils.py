@@ -1,8 +1,32 @@
 # -*- coding: utf-8 -*-
 """Graph utilities for circuit analysis."""
 
+import sys
+from itertools import chain, islice
+
 import networkx as nx
 
+# Name prefixes of nets and components synthesized by ast_to_graph rather than named in the source
+_IMPLICIT_PREFIX = "_implicit_"
+_INTERNAL_PREFIX = "_internal_"
+# Rail names preferred over device terminals when naming a reconstructed net
+_KNOWN_SIGNIFICANT_NODES = frozenset({"GND", "VDD"})
+
+# Component types reconstructed as connection blocks rather than series/parallel paths
+_MULTI_TERMINAL_TYPES = frozenset({"Nmos", "Pmos", "Opamp"})
+# Terminal order of reconstructed connection blocks; other terminals follow alphabetically
+_MOS_TERMINAL_ORDER = ("G", "D", "S", "B")
+_BLOCK_TERMINAL_ORDER = {
+    "Nmos": _MOS_TERMINAL_ORDER,
+    "Pmos": _MOS_TERMINAL_ORDER,
+    "Opamp": ("IN+", "IN-", "OUT", "V+", "V-"),
+}
+# Terminals ast_to_graph gives two-terminal elements placed in series paths and parallel blocks
+_PATH_TERMINALS = frozenset({"t1_series", "t2_series", "par_t1", "par_t2"})
+# Edge data of the parallel block terminals; add_edges_from copies it into each edge's own dict
+_EDGE_DATA_PAR_T1 = {"terminal": "par_t1"}
+_EDGE_DATA_PAR_T2 = {"terminal": "par_t2"}
+
 
 class DSU:
     """
@@ -12,6 +36,7 @@ class DSU:
 
     def __init__(self, preferred_roots=None):
         self.parent = {}
+        self.rank = {}  # Upper bound on tree height, used for union-by-rank
         self.num_sets = 0
         if preferred_roots is None:
             self.preferred_roots = {"GND", "VDD"}  # Default preferred roots
@@ -25,16 +50,36 @@ class DSU:
     def add_set(self, item):
         """Ensures an item is part of the DSU, creating a new set if it's new."""
         if item not in self.parent:
-            self.parent[item] = item
-            self.num_sets += 1
+            self._new_set(item)
+
+    def _new_set(self, item):
+        """Adds an item known not to be in the DSU as a singleton set; returns the stored key."""
+        if type(item) is str:
+            item = sys.intern(item)  # Composed names like "M1.G" are rebuilt per lookup; share one key object
+        self.parent[item] = item
+        self.rank[item] = 0
+        self.num_sets += 1
+        return item
 
     def find(self, item):
-        """Finds the representative (root) of the set containing item, with path compression."""
-        self.add_set(item)  # Ensure item is in DSU before finding
-        if self.parent[item] == item:
-            return item
-        self.parent[item] = self.find(self.parent[item])  # Path compression
-        return self.parent[item]
+        """Finds the representative (root) of the set containing item, with path splitting."""
+        parent = self.parent
+        item_parent = parent.get(item)
+        if item_parent is None:
+            return self._new_set(item)  # A new item is a singleton set and its own root
+        if item_parent == item:  # Already a root: one probe, and hand back the interned key
+            return item_parent
+        while item_parent != item:
+            grandparent = parent[item_parent]
+            parent[item] = grandparent  # Point every node on the path at its grandparent
+            item, item_parent = item_parent, grandparent
+        return item
+
+    def _link(self, child_root, new_root):
+        """Attaches child_root under new_root, keeping new_root's rank an upper bound on its height."""
+        self.parent[child_root] = new_root
+        if self.rank[new_root] <= self.rank[child_root]:
+            self.rank[new_root] = self.rank[child_root] + 1
 
     def _resolve_preferred_union(self, root1, root2):
         """Resolves union when both roots are preferred based on order and tie-breaking."""
@@ -48,14 +93,14 @@ class DSU:
             idx2 = float("inf")
 
         if idx1 < idx2:
-            self.parent[root2] = root1
+            self._link(root2, root1)
         elif idx2 < idx1:
-            self.parent[root1] = root2
+            self._link(root1, root2)
         else:  # Same preference or both not in ordered list
             if root1 < root2:  # Arbitrary but deterministic tie-break
-                self.parent[root2] = root1
+                self._link(root2, root1)
             else:
-                self.parent[root1] = root2
+                self._link(root1, root2)
         return True, True
 
     def union(self, u_name, v_name, connection_type, connection_detail):
@@ -70,16 +115,19 @@ class DSU:
         is_root2_preferred = root2 in self.preferred_roots
 
         if is_root1_preferred and not is_root2_preferred:
-            self.parent[root2] = root1
+            self._link(root2, root1)
             return True, True
         elif not is_root1_preferred and is_root2_preferred:
-            self.parent[root1] = root2
+            self._link(root1, root2)
             return True, True
         elif is_root1_preferred and is_root2_preferred:
             return self._resolve_preferred_union(root1, root2)
         else:
-            # Neither is preferred; let root2's original root become the representative
-            self.parent[root1] = root2
+            # Neither is preferred; union by rank, letting root2 become the representative on ties
+            if self.rank[root1] > self.rank[root2]:
+                self._link(root2, root1)
+            else:
+                self._link(root1, root2)
             return True, False
 
     def find_set_details(self, node_name):
@@ -93,7 +141,16 @@ class DSU:
 
     def get_all_canonical_representatives(self):
         """Returns a set of all canonical representatives."""
-        return {self.find(item) for item in self.parent}
+        find = self.find
+        return {find(item) for item in self.parent}
+
+    def members_by_root(self):
+        """Returns a root -> list of members map covering every set, built in a single sweep."""
+        members = {}
+        find = self.find
+        for item in self.parent:  # find only shortens parent links here, it never adds items
+            members.setdefault(find(item), []).append(item)
+        return members
 
     def get_set_members(self, representative_item):
         """Returns all items belonging to the same set as representative_item."""
@@ -101,9 +158,55 @@ class DSU:
         return {item for item in self.parent if self.find(item) == canonical_rep}
 
 
+def _new_net_dsu():
+    """Returns the electrical-net DSU that ast_to_graph and build_net_dsu start from, with the special nets added."""
+    electrical_nets_dsu = DSU()
+    for special_node in ["GND", "VDD"]:
+        electrical_nets_dsu.add_set(special_node)
+    return electrical_nets_dsu
+
+
+def _seed_statement_nets(stmt_type, stmt, electrical_nets_dsu):
+    """Adds every net a connection statement names to the DSU, ahead of any union."""
+    if stmt_type == "component_connection_block":
+        comp_name = stmt["component_name"]
+        for conn in stmt.get("connections", []):
+            electrical_nets_dsu.add_set(conn["node"])
+            electrical_nets_dsu.add_set(f"{comp_name}.{conn['terminal']}")
+    elif stmt_type == "direct_assignment":
+        electrical_nets_dsu.add_set(stmt["source_node"])
+        electrical_nets_dsu.add_set(stmt["target_node"])
+    elif stmt_type == "series_connection":
+        for item in stmt.get("path", []):
+            if item.get("type") == "node":
+                electrical_nets_dsu.add_set(item["name"])
+
+
+def _union_block_connection(electrical_nets_dsu, comp_name, terminal_name, explicit_net_name):
+    """Joins the net of a block connection's device terminal (e.g. "M1.G") with the net it names."""
+    electrical_nets_dsu.union(
+        f"{comp_name}.{terminal_name}",
+        explicit_net_name,
+        "component_connection",
+        {"terminal": terminal_name, "net": explicit_net_name},
+    )
+
+
+def _union_direct_assignment(electrical_nets_dsu, s_node, t_node):
+    """Joins the two nets of a direct assignment."""
+    electrical_nets_dsu.union(s_node, t_node, "direct_assignment", {"source": s_node, "target": t_node})
+
+
+_CONNECTION_STATEMENT_TYPES = frozenset({"component_connection_block", "direct_assignment", "series_connection"})
+
+
 def _process_declarations(G, parsed_statements, electrical_nets_dsu):
-    """Process declarations and pre-populate DSU with known explicit net names."""
+    """Process declarations and pre-populate DSU with known explicit net names.
+
+    Returns the declared components and, in order, the connection statements left for the second pass.
+    """
     declared_components = {}
+    connection_statements = []
     for stmt in parsed_statements:
         stmt_type = stmt.get("type")
         if stmt_type == "declaration":
@@ -115,22 +218,21 @@ def _process_declarations(G, parsed_statements, electrical_nets_dsu):
                 "instance_node_name": inst_name,
             }
             G.add_node(inst_name, node_kind="component_instance", instance_type=comp_type)
-        elif stmt_type == "component_connection_block":
-            comp_name = stmt["component_name"]
-            for conn in stmt.get("connections", []):
-                electrical_nets_dsu.add_set(conn["node"])
-                electrical_nets_dsu.add_set(f"{comp_name}.{conn['terminal']}")
-        elif stmt_type == "direct_assignment":
-            electrical_nets_dsu.add_set(stmt["source_node"])
-            electrical_nets_dsu.add_set(stmt["target_node"])
-        elif stmt_type == "series_connection":
-            for item in stmt.get("path", []):
-                if item.get("type") == "node":
-                    electrical_nets_dsu.add_set(item["name"])
-    return declared_components
+        elif stmt_type in _CONNECTION_STATEMENT_TYPES:
+            _seed_statement_nets(stmt_type, stmt, electrical_nets_dsu)
+            connection_statements.append(stmt)
+    return declared_components, connection_statements
+
+
+def _split_comp_term(name):
+    """Splits a device terminal name like "M1.G" at its first dot; (None, None) for a plain net name."""
+    dot = name.find(".")
+    if dot < 0:
+        return None, None
+    return name[:dot], name[dot + 1 :]
 
 
-def _handle_component_connection(G, stmt, declared_components, electrical_nets_dsu):
+def _handle_component_connection(G, graph_nodes, edges, stmt, declared_components, electrical_nets_dsu):
     """Handle component connection block statements."""
     comp_name = stmt["component_name"]
     if comp_name not in declared_components:
@@ -141,42 +243,38 @@ def _handle_component_connection(G, stmt, declared_components, electrical_nets_d
     for conn in stmt.get("connections", []):
         terminal_name = conn["terminal"]
         explicit_net_name = conn["node"]
-        device_terminal = f"{comp_name}.{terminal_name}"
 
-        electrical_nets_dsu.union(
-            device_terminal,
-            explicit_net_name,
-            "component_connection",
-            {"terminal": terminal_name, "net": explicit_net_name},
-        )
+        _union_block_connection(electrical_nets_dsu, comp_name, terminal_name, explicit_net_name)
         canonical_net = electrical_nets_dsu.find(explicit_net_name)
-        if not G.has_node(canonical_net):
+        if canonical_net not in graph_nodes:
+            graph_nodes.add(canonical_net)
             G.add_node(canonical_net, node_kind="electrical_net")
-        G.add_edge(comp_node_name, canonical_net, terminal=terminal_name)
+        edges.append((comp_node_name, canonical_net, {"terminal": terminal_name}))
 
-        if "." in explicit_net_name:
-            ref_comp, ref_term = explicit_net_name.split(".", 1)
-            if ref_comp in declared_components:
-                G.add_edge(ref_comp, canonical_net, terminal=ref_term)
+        ref_comp, ref_term = _split_comp_term(explicit_net_name)
+        if ref_comp in declared_components:  # None for a plain net name, which is never declared
+            edges.append((ref_comp, canonical_net, {"terminal": ref_term}))
 
 
-def _handle_direct_assignment(G, stmt, declared_components, electrical_nets_dsu):
+def _handle_direct_assignment(G, graph_nodes, edges, stmt, declared_components, electrical_nets_dsu):
     """Handle direct assignment statements."""
     s_node, t_node = stmt["source_node"], stmt["target_node"]
-    electrical_nets_dsu.union(s_node, t_node, "direct_assignment", {"source": s_node, "target": t_node})
+    _union_direct_assignment(electrical_nets_dsu, s_node, t_node)
     canonical_net = electrical_nets_dsu.find(s_node)
-    if not G.has_node(canonical_net):
+    if canonical_net not in graph_nodes:
+        graph_nodes.add(canonical_net)
         G.add_node(canonical_net, node_kind="electrical_net")
 
     for node_name in [s_node, t_node]:
-        if "." in node_name:
-            comp_name, term = node_name.split(".", 1)
-            if comp_name in declared_components:
-                G.add_edge(comp_name, canonical_net, terminal=term)
+        comp_name, term = _split_comp_term(node_name)
+        if comp_name in declared_components:
+            edges.append((comp_name, canonical_net, {"terminal": term}))
 
 
 def _handle_series_connection(
     G,
+    graph_nodes,
+    edges,
     stmt,
     declared_components,
     electrical_nets_dsu,
@@ -190,24 +288,17 @@ def _handle_series_connection(
         return implicit_node_idx, internal_component_idx
 
     # Process start node
-    start_node_original_name = path[0]["name"]
-    current_attach_point = electrical_nets_dsu.find(start_node_original_name)
-    if not G.has_node(current_attach_point):
-        G.add_node(current_attach_point, node_kind="electrical_net")
-
-    if "." in start_node_original_name:
-        comp_part, term_part = start_node_original_name.split(".", 1)
-        if comp_part in declared_components:
-            G.add_edge(comp_part, current_attach_point, terminal=term_part)
-
-    # Process remaining path elements
-    for i in range(1, len(path)):
-        item = path[i]
+    current_attach_point = _handle_series_node(G, graph_nodes, edges, path[0], declared_components, electrical_nets_dsu)
+
+    # Process remaining path elements in one forward walk, pairing each with its successor (None at the end)
+    following_items = chain(islice(path, 2, None), (None,))
+    for item, next_item in zip(islice(path, 1, None), following_items):
         current_attach_point, implicit_node_idx, internal_component_idx = _process_series_path_item(
             G,
+            graph_nodes,
+            edges,
             item,
-            path,
-            i,
+            next_item,
             declared_components,
             electrical_nets_dsu,
             current_attach_point,
@@ -218,34 +309,34 @@ def _handle_series_connection(
     return implicit_node_idx, internal_component_idx
 
 
-def _handle_series_node(G, item, declared_components, electrical_nets_dsu):
+def _handle_series_node(G, graph_nodes, edges, item, declared_components, electrical_nets_dsu):
     """Handle node item in series path."""
     node_name = item["name"]
     new_attach_point = electrical_nets_dsu.find(node_name)
-    if not G.has_node(new_attach_point):
+    if new_attach_point not in graph_nodes:
+        graph_nodes.add(new_attach_point)
         G.add_node(new_attach_point, node_kind="electrical_net")
-    if "." in node_name:
-        comp_part, term_part = node_name.split(".", 1)
-        if comp_part in declared_components:
-            G.add_edge(comp_part, new_attach_point, terminal=term_part)
+    comp_part, term_part = _split_comp_term(node_name)
+    if comp_part in declared_components:
+        edges.append((comp_part, new_attach_point, {"terminal": term_part}))
     return new_attach_point
 
 
-def _determine_next_attach_point(G, path, item_index, electrical_nets_dsu, implicit_node_idx):
-    """Determine the next attach point in series path."""
+def _determine_next_attach_point(G, graph_nodes, next_item, electrical_nets_dsu, implicit_node_idx):
+    """Determine the next attach point in series path from the item that follows; None past the end."""
     next_attach_point = None
     created_new_implicit_node = False
 
-    if item_index + 1 < len(path) and path[item_index + 1].get("type") == "node":
-        next_node_name = path[item_index + 1]["name"]
-        next_attach_point = electrical_nets_dsu.find(next_node_name)
+    if next_item is not None and next_item.get("type") == "node":
+        next_attach_point = electrical_nets_dsu.find(next_item["name"])
     else:
-        implicit_node_name = f"_implicit_{implicit_node_idx}"
+        implicit_node_name = f"{_IMPLICIT_PREFIX}{implicit_node_idx}"
         next_attach_point = electrical_nets_dsu.find(implicit_node_name)
-        if not G.has_node(next_attach_point):
+        if next_attach_point not in graph_nodes:
             created_new_implicit_node = True
 
-    if next_attach_point and not G.has_node(next_attach_point):
+    if next_attach_point and next_attach_point not in graph_nodes:
+        graph_nodes.add(next_attach_point)
         G.add_node(next_attach_point, node_kind="electrical_net")
 
     return next_attach_point, created_new_implicit_node
@@ -253,9 +344,10 @@ def _determine_next_attach_point(G, path, item_index, electrical_nets_dsu, impli
 
 def _process_series_path_item(
     G,
+    graph_nodes,
+    edges,
     item,
-    path,
-    item_index,
+    next_item,
     declared_components,
     electrical_nets_dsu,
     current_attach_point,
@@ -266,21 +358,23 @@ def _process_series_path_item(
     item_type = item.get("type")
 
     if item_type == "node":
-        new_attach_point = _handle_series_node(G, item, declared_components, electrical_nets_dsu)
+        new_attach_point = _handle_series_node(G, graph_nodes, edges, item, declared_components, electrical_nets_dsu)
         return new_attach_point, implicit_node_idx, internal_component_idx
 
     next_attach_point, created_new_implicit_node = _determine_next_attach_point(
-        G, path, item_index, electrical_nets_dsu, implicit_node_idx
+        G, graph_nodes, next_item, electrical_nets_dsu, implicit_node_idx
     )
 
     # Handle different item types
     if item_type == "component":
-        _handle_series_component(G, item, declared_components, current_attach_point, next_attach_point)
+        _handle_series_component(edges, item, declared_components, current_attach_point, next_attach_point)
     elif item_type == "source":
-        _handle_series_source(G, item, declared_components, current_attach_point, next_attach_point)
+        _handle_series_source(G, edges, item, declared_components, current_attach_point, next_attach_point)
     elif item_type == "parallel_block":
         internal_component_idx = _handle_parallel_block(
             G,
+            graph_nodes,
+            edges,
             item,
             declared_components,
             current_attach_point,
@@ -294,17 +388,17 @@ def _process_series_path_item(
     return next_attach_point, implicit_node_idx, internal_component_idx
 
 
-def _handle_series_component(G, item, declared_components, current_attach_point, next_attach_point):
+def _handle_series_component(edges, item, declared_components, current_attach_point, next_attach_point):
     """Handle component in series connection."""
     comp_name = item["name"]
     if comp_name not in declared_components:
         return
     comp_node_name = declared_components[comp_name]["instance_node_name"]
-    G.add_edge(comp_node_name, current_attach_point, terminal="t1_series", key="t1_series")
-    G.add_edge(comp_node_name, next_attach_point, terminal="t2_series", key="t2_series")
+    edges.append((comp_node_name, current_attach_point, "t1_series", {"terminal": "t1_series"}))
+    edges.append((comp_node_name, next_attach_point, "t2_series", {"terminal": "t2_series"}))
 
 
-def _handle_series_source(G, item, declared_components, current_attach_point, next_attach_point):
+def _handle_series_source(G, edges, item, declared_components, current_attach_point, next_attach_point):
     """Handle source in series connection."""
     source_name = item["name"]
     if source_name not in declared_components:
@@ -314,15 +408,17 @@ def _handle_series_source(G, item, declared_components, current_attach_point, ne
     G.nodes[source_node_name]["polarity"] = polarity
 
     if polarity == "-+":
-        G.add_edge(source_name, current_attach_point, terminal="neg", key="neg")
-        G.add_edge(source_name, next_attach_point, terminal="pos", key="pos")
+        edges.append((source_name, current_attach_point, "neg", {"terminal": "neg"}))
+        edges.append((source_name, next_attach_point, "pos", {"terminal": "pos"}))
     else:
-        G.add_edge(source_name, current_attach_point, terminal="pos", key="pos")
-        G.add_edge(source_name, next_attach_point, terminal="neg", key="neg")
+        edges.append((source_name, current_attach_point, "pos", {"terminal": "pos"}))
+        edges.append((source_name, next_attach_point, "neg", {"terminal": "neg"}))
 
 
 def _handle_parallel_block(
     G,
+    graph_nodes,
+    edges,
     item,
     declared_components,
     current_attach_point,
@@ -331,42 +427,80 @@ def _handle_parallel_block(
 ):
     """Handle parallel block in series connection."""
     for pel in item.get("elements", []):
-        element_node_name = None
-        attrs = {"node_kind": "component_instance"}
-
-        if pel["type"] == "component":
-            if pel["name"] in declared_components:
-                element_node_name = declared_components[pel["name"]]["instance_node_name"]
-        elif pel["type"] == "controlled_source":
-            element_node_name = f"_internal_cs_{internal_component_idx}"
-            attrs.update(
-                {
-                    "instance_type": "controlled_source",
-                    "expression": pel["expression"],
-                    "direction": pel["direction"],
-                }
-            )
+        pel_type = pel["type"]
+        if pel_type == "component":
+            declared = declared_components.get(pel["name"])
+            if declared is None:
+                continue
+            element_node_name = declared["instance_node_name"]
+        elif pel_type == "controlled_source":
+            element_node_name = f"{_INTERNAL_PREFIX}cs_{internal_component_idx}"
             internal_component_idx += 1
-        elif pel["type"] == "noise_source":
-            element_node_name = f"_internal_ns_{internal_component_idx}"
-            attrs.update(
-                {
-                    "instance_type": "noise_source",
-                    "id": pel["id"],
-                    "direction": pel["direction"],
-                }
-            )
+            if element_node_name not in graph_nodes:
+                graph_nodes.add(element_node_name)
+                G.add_node(
+                    element_node_name,
+                    node_kind="component_instance",
+                    instance_type="controlled_source",
+                    expression=pel["expression"],
+                    direction=pel["direction"],
+                )
+        elif pel_type == "noise_source":
+            element_node_name = f"{_INTERNAL_PREFIX}ns_{internal_component_idx}"
             internal_component_idx += 1
+            if element_node_name not in graph_nodes:
+                graph_nodes.add(element_node_name)
+                G.add_node(
+                    element_node_name,
+                    node_kind="component_instance",
+                    instance_type="noise_source",
+                    id=pel["id"],
+                    direction=pel["direction"],
+                )
+        else:
+            continue
 
-        if element_node_name:
-            if not G.has_node(element_node_name):
-                G.add_node(element_node_name, **attrs)
-            G.add_edge(element_node_name, current_attach_point, terminal="par_t1", key="par_t1")
-            G.add_edge(element_node_name, next_attach_point, terminal="par_t2", key="par_t2")
+        edges.append((element_node_name, current_attach_point, "par_t1", _EDGE_DATA_PAR_T1))
+        edges.append((element_node_name, next_attach_point, "par_t2", _EDGE_DATA_PAR_T2))
 
     return internal_component_idx
 
 
+def build_net_dsu(parsed_statements):
+    """
+    Builds the electrical-net DSU of an AST without constructing its graph.
+
+    Sets are added and unions applied through the same helpers and in the same order as
+    ``ast_to_graph``, so every net name resolves to the same canonical representative as in
+    the DSU it returns.
+    Implicit series nodes are not created; ``find`` adds any such name on demand.
+    """
+    electrical_nets_dsu = _new_net_dsu()
+
+    declared_components = set()
+    union_statements = []  # Only blocks and direct assignments union nets; the second pass needs nothing else
+    for stmt in parsed_statements:
+        stmt_type = stmt.get("type")
+        if stmt_type == "declaration":
+            declared_components.add(stmt["instance_name"])
+        elif stmt_type in _CONNECTION_STATEMENT_TYPES:
+            _seed_statement_nets(stmt_type, stmt, electrical_nets_dsu)
+            if stmt_type != "series_connection":
+                union_statements.append(stmt)
+
+    for stmt in union_statements:
+        if stmt["type"] == "component_connection_block":
+            comp_name = stmt["component_name"]
+            if comp_name not in declared_components:  # ast_to_graph skips undeclared blocks too
+                continue
+            for conn in stmt.get("connections", []):
+                _union_block_connection(electrical_nets_dsu, comp_name, conn["terminal"], conn["node"])
+        else:
+            _union_direct_assignment(electrical_nets_dsu, stmt["source_node"], stmt["target_node"])
+
+    return electrical_nets_dsu
+
+
 def ast_to_graph(parsed_statements):
     """
     Converts a Proto-Language AST into a graph representation.
@@ -384,36 +518,38 @@ def ast_to_graph(parsed_statements):
           component terminal involved in the connection.
     """
     G = nx.MultiGraph()
-    electrical_nets_dsu = DSU()
-
-    # Initialize special nodes
-    for special_node in ["GND", "VDD"]:
-        electrical_nets_dsu.add_set(special_node)
+    electrical_nets_dsu = _new_net_dsu()
 
     implicit_node_idx = 0
     internal_component_idx = 0
 
-    # Pass 1: Process declarations
-    declared_components = _process_declarations(G, parsed_statements, electrical_nets_dsu)
-
-    # Pass 2: Process connections
-    for stmt in parsed_statements:
-        stmt_type = stmt.get("type")
-        if stmt_type == "declaration":
-            continue
-        elif stmt_type == "component_connection_block":
-            _handle_component_connection(G, stmt, declared_components, electrical_nets_dsu)
+    # Pass 1: Process declarations; the only pass over parsed_statements, which may be any iterable.
+    # Connections wait for pass 2 because they may name components declared further down.
+    declared_components, connection_statements = _process_declarations(G, parsed_statements, electrical_nets_dsu)
+
+    # Pass 2: Process connections. Net and internal component nodes are added as they are
+    # met; edges only join existing nodes, so they are collected and added in one batch.
+    # graph_nodes mirrors G's node set, so "already added?" is a plain set lookup.
+    graph_nodes = set(G)
+    edges = []
+    for stmt in connection_statements:
+        stmt_type = stmt["type"]
+        if stmt_type == "component_connection_block":
+            _handle_component_connection(G, graph_nodes, edges, stmt, declared_components, electrical_nets_dsu)
         elif stmt_type == "direct_assignment":
-            _handle_direct_assignment(G, stmt, declared_components, electrical_nets_dsu)
+            _handle_direct_assignment(G, graph_nodes, edges, stmt, declared_components, electrical_nets_dsu)
         elif stmt_type == "series_connection":
             implicit_node_idx, internal_component_idx = _handle_series_connection(
                 G,
+                graph_nodes,
+                edges,
                 stmt,
                 declared_components,
                 electrical_nets_dsu,
                 implicit_node_idx,
                 internal_component_idx,
             )
+    G.add_edges_from(edges)
 
     # TODO: Optional: Create a "cleaner" graph where all net nodes are guaranteed to be their canonical names
     # This involves relabeling or creating a new graph.
@@ -428,10 +564,12 @@ def get_preferred_net_name_for_reconstruction(
     canonical_net_name,
     dsu,
     known_significant_nodes=None,
-    allow_implicit_if_only_option=False,
+    allow_implicit_if_only_option=False,  # pylint: disable=unused-argument
 ):
+    # allow_implicit_if_only_option is accepted for existing callers; a set with only implicit
+    # members is named by its canonical net either way.
     if known_significant_nodes is None:
-        known_significant_nodes = {"GND", "VDD"}
+        known_significant_nodes = _KNOWN_SIGNIFICANT_NODES
 
     if not dsu or canonical_net_name not in dsu.parent:
         return canonical_net_name
@@ -439,58 +577,63 @@ def get_preferred_net_name_for_reconstruction(
     members = dsu.get_set_members(canonical_net_name)
     if not members:
         return canonical_net_name
+    return _choose_preferred_net_name(canonical_net_name, members, known_significant_nodes)
+
+
+def _choose_preferred_net_name(canonical_net_name, members, known_significant_nodes):
+    """Picks the reconstruction name of a net among the members of its set."""
+    # Sort every member into its priority bucket in one pass
+    user_named = []
+    sigs = []
+    dev_terms = []
+    for m in members:
+        if m in known_significant_nodes:
+            sigs.append(m)
+        elif m.startswith(_IMPLICIT_PREFIX):
+            continue
+        elif "." in m:
+            dev_terms.append(m)
+        else:
+            user_named.append(m)
+
+    # Priority, each preferring shorter, then alphabetically first names:
+    # 1. User-defined, non-device terminal, non-significant common rail names
+    # 2. Known significant common rails
+    # 3. User-defined device terminals (e.g., M1.G)
+    for bucket in (user_named, sigs, dev_terms):
+        if bucket:
+            return min(bucket, key=lambda x: (len(x), x))
+
+    # 4. Any other non-implicit name would be a rail or device terminal, so only implicit names are left.
+    # 5. The canonical_net_name is then an _implicit_ node itself, and is used as is.
+    return canonical_net_name
 
-    # Priority:
-    # 1. User-defined, non-device terminal, non-significant common rail names (prefer shorter, then alpha)
-    user_named = sorted(
-        [m for m in members if not m.startswith("_implicit_") and "." not in m and m not in known_significant_nodes],
-        key=lambda x: (len(x), x),
-    )
-    if user_named:
-        return user_named[0]
-
-    # 2. Known significant common rails (prefer shorter, then alpha)
-    sigs = sorted([m for m in members if m in known_significant_nodes], key=lambda x: (len(x), x))
-    if sigs:
-        return sigs[0]
-
-    # 3. User-defined device terminals (e.g., M1.G) (prefer shorter, then alpha)
-    dev_terms = sorted(
-        [m for m in members if "." in m and not m.startswith("_implicit_")],
-        key=lambda x: (len(x), x),
-    )
-    if dev_terms:
-        return dev_terms[0]
 
-    # 4. Any other non-implicit name
-    non_implicit = sorted(
-        [m for m in members if not m.startswith("_implicit_")],
-        key=lambda x: (len(x), x),
-    )
-    if non_implicit:
-        return non_implicit[0]
-
-    # 5. Implicit name, only if allowed or no other option
-    # The canonical_net_name itself might be an implicit one. Use its preferred form.
-    # If allow_implicit_if_only_option is True, or if it's the only option.
-    # The DSU find operation already gives a canonical representative.
-    # If all other attempts fail, this means the canonical_net_name is likely an _implicit_ node.
-    if allow_implicit_if_only_option or canonical_net_name.startswith("_implicit_"):
-        return canonical_net_name
+def get_node_kinds(graph):
+    """Returns a node_name -> node_kind map, for callers looking up many neighbours."""
+    return {n: data.get("node_kind") for n, data in graph.nodes(data=True)}
 
-    # Fallback, should ideally be covered by one of the above.
-    return canonical_net_name
 
+def get_component_connectivity(graph, comp_name, node_kinds=None):
+    """Helper to find nets a component is connected to and via which terminals.
 
-def get_component_connectivity(graph, comp_name):
-    """Helper to find nets a component is connected to and via which terminals."""
+    ``node_kinds`` may be a precomputed map from get_node_kinds(); callers that query
+    many components pass it to skip a graph node-attribute lookup per edge.
+    """
     connections = {}  # terminal_name -> canonical_net_name
     raw_connections = []  # list of {'term': ..., 'net_canon': ...} for ordering later if needed
 
-    # For MultiGraph, we need to handle potentially multiple edges per node pair
-    for u, v, edge_data in graph.edges(comp_name, data=True):
-        neighbor_net_canonical = v if u == comp_name else u
-        if graph.nodes[neighbor_net_canonical].get("node_kind") == "electrical_net":
+    graph_nodes = graph.nodes
+    # Walk the adjacency dict directly: neighbour -> {edge_key: edge_data} for a MultiGraph
+    for neighbor_net_canonical, keyed_edges in graph.adj[comp_name].items():
+        if node_kinds is None:
+            neighbor_kind = graph_nodes[neighbor_net_canonical].get("node_kind")
+        else:
+            neighbor_kind = node_kinds.get(neighbor_net_canonical)
+        if neighbor_kind != "electrical_net":
+            continue
+        for edge_data in keyed_edges.values():
+            # Block connections are keyed 0, 1, ... so the terminal comes from the edge data
             terminal = edge_data.get("terminal")
             if terminal:
                 if terminal not in connections:  # Keep first occurrence of each terminal
@@ -499,16 +642,31 @@ def get_component_connectivity(graph, comp_name):
     return connections, raw_connections
 
 
-def _get_component_nodes_data(graph):
-    """Get all component nodes with their full attributes."""
-    return {n: graph.nodes[n] for n in graph.nodes if graph.nodes[n].get("node_kind") == "component_instance"}
+def get_component_instances(graph, node_kinds=None):
+    """Returns the component_instance nodes of a graph, optionally from a precomputed get_node_kinds() map."""
+    if node_kinds is None:
+        node_kinds = get_node_kinds(graph)
+    return [n for n, kind in node_kinds.items() if kind == "component_instance"]
+
+
+def _collect_component_nodes(graph):
+    """Get all component nodes with their full attributes and terminal connectivity in one pass."""
+    component_nodes_data = {}
+    component_connections = {}
+    node_kinds = get_node_kinds(graph)  # Built per call, so copies and edited graphs are never read stale
+    graph_nodes = graph.nodes
+    for node_name, kind in node_kinds.items():
+        if kind == "component_instance":
+            component_nodes_data[node_name] = graph_nodes[node_name]
+            component_connections[node_name], _ = get_component_connectivity(graph, node_name, node_kinds)
+    return component_nodes_data, component_connections
 
 
 def _emit_declarations(component_nodes_data):
     """Emit all component declarations."""
     ast_statements = []
     all_declared_comp_names = sorted(
-        [n for n, data in component_nodes_data.items() if not n.startswith("_internal_") and data.get("instance_type")]
+        [n for n, data in component_nodes_data.items() if not n.startswith(_INTERNAL_PREFIX) and data.get("instance_type")]
     )
 
     for comp_name in all_declared_comp_names:
@@ -523,17 +681,40 @@ def _emit_declarations(component_nodes_data):
     return ast_statements, all_declared_comp_names
 
 
-def _reconstruct_multi_terminal_blocks(graph, component_nodes_data, dsu, comp_names, processed_components):
+def _preferred_name_resolver(dsu, members_by_root):
+    """Return a function giving each canonical net's reconstruction name, computed at most once per net.
+
+    Gives the same names as get_preferred_net_name_for_reconstruction(..., allow_implicit_if_only_option=True),
+    but reads set members from members_by_root (see DSU.members_by_root) instead of sweeping the DSU per net.
+    """
+    preferred_names = {}
+
+    def preferred_name(canonical_net_name):
+        name = preferred_names.get(canonical_net_name)
+        if name is None:
+            if not dsu or canonical_net_name not in dsu.parent:
+                name = canonical_net_name
+            else:
+                members = members_by_root[dsu.find(canonical_net_name)]
+                name = _choose_preferred_net_name(canonical_net_name, members, _KNOWN_SIGNIFICANT_NODES)
+            preferred_names[canonical_net_name] = name
+        return name
+
+    return preferred_name
+
+
+def _reconstruct_multi_terminal_blocks(
+    component_connections, component_nodes_data, preferred_name, comp_names, processed_components
+):
     """Reconstruct connection blocks for multi-terminal components."""
     ast_statements = []
-    MULTI_TERMINAL_TYPES = {"Nmos", "Pmos", "Opamp"}
 
     for comp_name in comp_names:
         comp_type = component_nodes_data[comp_name]["instance_type"]
-        if comp_type in MULTI_TERMINAL_TYPES:
-            connections_map, _ = get_component_connectivity(graph, comp_name)
+        if comp_type in _MULTI_TERMINAL_TYPES:
+            connections_map = component_connections[comp_name]
             if connections_map:
-                block_connections = _create_block_connections(comp_type, connections_map, dsu)
+                block_connections = _create_block_connections(comp_type, connections_map, preferred_name)
                 if block_connections:
                     ast_statements.append(
                         {
@@ -547,71 +728,60 @@ def _reconstruct_multi_terminal_blocks(graph, component_nodes_data, dsu, comp_na
     return ast_statements
 
 
-def _create_block_connections(comp_type, connections_map, dsu):
+def _create_block_connections(comp_type, connections_map, preferred_name):
     """Create ordered block connections for a component."""
-    terminal_order_preference = []
-    if comp_type in ["Nmos", "Pmos"]:
-        terminal_order_preference = ["G", "D", "S", "B"]
-    elif comp_type == "Opamp":
-        terminal_order_preference = ["IN+", "IN-", "OUT", "V+", "V-"]
-
-    present_terminals = list(connections_map.keys())
-    sorted_terminals = [t for t in terminal_order_preference if t in present_terminals]
-    remaining_terminals = sorted([t for t in present_terminals if t not in sorted_terminals])
+    terminal_order_preference = _BLOCK_TERMINAL_ORDER.get(comp_type, ())
+    sorted_terminals = [t for t in terminal_order_preference if t in connections_map]
+    remaining_terminals = sorted(t for t in connections_map if t not in sorted_terminals)
     final_sorted_terminals = sorted_terminals + remaining_terminals
 
     block_connections = []
     for term in final_sorted_terminals:
-        net_canonical = connections_map[term]
-        preferred_net_name = get_preferred_net_name_for_reconstruction(net_canonical, dsu, allow_implicit_if_only_option=True)
-        block_connections.append({"terminal": term, "node": preferred_net_name})
+        block_connections.append({"terminal": term, "node": preferred_name(connections_map[term])})
     return block_connections
 
 
-def _reconstruct_series_paths(graph, component_nodes_data, dsu, processed_components):
+def _reconstruct_series_paths(component_connections, component_nodes_data, preferred_name, processed_components):
     """Reconstruct series and parallel paths."""
     ast_statements = []
-    net_pair_to_components = _group_components_by_net_pairs(graph, component_nodes_data, processed_components)
+    net_pair_to_components = _group_components_by_net_pairs(component_connections, component_nodes_data, processed_components)
 
     for (net1_canon, net2_canon), comps_in_group in net_pair_to_components.items():
         if not comps_in_group:
             continue
 
-        path_elements = _create_path_elements(net1_canon, net2_canon, comps_in_group, component_nodes_data, dsu)
+        path_elements = _create_path_elements(net1_canon, net2_canon, comps_in_group, component_nodes_data, preferred_name)
         ast_statements.append({"type": "series_connection", "path": path_elements, "line": 0})
         processed_components.update(comps_in_group)
 
     return ast_statements
 
 
-def _group_components_by_net_pairs(graph, component_nodes_data, processed_components):
+def _group_components_by_net_pairs(component_connections, component_nodes_data, processed_components):
     """Group components by the nets they connect."""
     net_pair_to_components = {}
-    MULTI_TERMINAL_TYPES = {"Nmos", "Pmos", "Opamp"}
 
     all_comp_names = sorted(
         [
             n
             for n, data in component_nodes_data.items()
             if data.get("instance_type")
-            and (not n.startswith("_internal_") or data.get("instance_type") in ["controlled_source", "noise_source"])
+            and (not n.startswith(_INTERNAL_PREFIX) or data.get("instance_type") in ["controlled_source", "noise_source"])
             and n not in processed_components
         ]
     )
 
     for comp_name in all_comp_names:
         comp_type = component_nodes_data[comp_name]["instance_type"]
-        if comp_type not in MULTI_TERMINAL_TYPES:
-            connections_map, _ = get_component_connectivity(graph, comp_name)
+        if comp_type not in _MULTI_TERMINAL_TYPES:
+            connections_map = component_connections[comp_name]
             distinct_nets = set(connections_map.values())
 
             if len(distinct_nets) == 2:
                 valid_terminals = _get_valid_terminals(comp_type, connections_map)
                 if len(valid_terminals) == 2:
-                    nets_for_key = tuple(sorted([connections_map[term] for term in valid_terminals]))
-                    if nets_for_key not in net_pair_to_components:
-                        net_pair_to_components[nets_for_key] = []
-                    net_pair_to_components[nets_for_key].append(comp_name)
+                    nets_for_key = tuple(sorted(connections_map[term] for term in valid_terminals))
+                    net_pair_to_components.setdefault(nets_for_key, []).append(comp_name)
     return net_pair_to_components
 
 
@@ -622,33 +792,22 @@ def _get_valid_terminals(comp_type, connections_map):
         if "pos" in connections_map and "neg" in connections_map:
             valid_terminals.update(["pos", "neg"])
     elif comp_type in ["R", "C", "L", "controlled_source", "noise_source"]:
-        path_terms = {"t1_series", "t2_series", "par_t1", "par_t2"}
-        found_path_terms = {t for t in connections_map if t in path_terms}
+        found_path_terms = {t for t in connections_map if t in _PATH_TERMINALS}
         if len(found_path_terms) == 2:
             valid_terminals.update(found_path_terms)
     return valid_terminals
 
 
-def _create_path_elements(net1_canon, net2_canon, comps_in_group, component_nodes_data, dsu):
+def _create_path_elements(net1_canon, net2_canon, comps_in_group, component_nodes_data, preferred_name):
     """Create path elements for series/parallel reconstruction."""
-    path_elements = [
-        {
-            "type": "node",
-            "name": get_preferred_net_name_for_reconstruction(net1_canon, dsu, allow_implicit_if_only_option=True),
-        }
-    ]
+    path_elements = [{"type": "node", "name": preferred_name(net1_canon)}]
 
     if len(comps_in_group) == 1:
         path_elements.extend(_create_single_component_path(comps_in_group[0], component_nodes_data))
     else:
         path_elements.append(_create_parallel_block(comps_in_group, component_nodes_data))
 
-    path_elements.append(
-        {
-            "type": "node",
-            "name": get_preferred_net_name_for_reconstruction(net2_canon, dsu, allow_implicit_if_only_option=True),
-        }
-    )
+    path_elements.append({"type": "node", "name": preferred_name(net2_canon)})
     return path_elements
 
 
@@ -663,7 +822,7 @@ def _create_single_component_path(comp_name, component_nodes_data):
                 "polarity": comp_data["polarity"],
             }
         ]
-    elif comp_name.startswith("_internal_"):
+    elif comp_name.startswith(_INTERNAL_PREFIX):
         if comp_data["instance_type"] == "controlled_source":
             return [
                 {
@@ -688,7 +847,7 @@ def _create_parallel_block(comps_in_group, component_nodes_data):
     parallel_block_elements = []
     for comp_name in sorted(comps_in_group):
         comp_data = component_nodes_data[comp_name]
-        if comp_name.startswith("_internal_"):
+        if comp_name.startswith(_INTERNAL_PREFIX):
             if comp_data["instance_type"] == "controlled_source":
                 parallel_block_elements.append(
                     {
@@ -718,42 +877,42 @@ def _create_parallel_block(comps_in_group, component_nodes_data):
     return {"type": "parallel_block", "elements": parallel_block_elements}
 
 
-def _reconstruct_direct_assignments(dsu):
-    """Reconstruct direct assignment statements."""
+def _reconstruct_direct_assignments(members_by_root, preferred_name):
+    """Reconstruct direct assignment statements from the DSU's root -> members map."""
     ast_statements = []
-    all_handled_aliases = set()
-    all_canonical_representatives = dsu.get_all_canonical_representatives()
 
-    for canonical_rep in sorted(list(all_canonical_representatives)):
-        members = sorted(list(dsu.get_set_members(canonical_rep)))
+    # Every net belongs to exactly one set and each set has a single target name,
+    # so each (member, target) pair is produced at most once and needs no dedup.
+    for canonical_rep in sorted(members_by_root):
+        members = sorted(members_by_root[canonical_rep])
         if len(members) > 1:
-            preferred_target_name = get_preferred_net_name_for_reconstruction(
-                canonical_rep, dsu, allow_implicit_if_only_option=True
-            )
+            preferred_target_name = preferred_name(canonical_rep)
+            # Implicit members are only spelled out when the set has nothing better to point them at
+            skip_implicit_members = not preferred_target_name.startswith(_IMPLICIT_PREFIX)
             for member_node in members:
                 if member_node == preferred_target_name:
                     continue
-                if member_node.startswith("_implicit_") and not preferred_target_name.startswith("_implicit_"):
+                if skip_implicit_members and member_node.startswith(_IMPLICIT_PREFIX):
                     continue
 
-                alias_pair_key = frozenset({member_node, preferred_target_name})
-                if alias_pair_key not in all_handled_aliases:
-                    ast_statements.append(
-                        {
-                            "type": "direct_assignment",
-                            "source_node": member_node,
-                            "target_node": preferred_target_name,
-                            "line": 0,
-                        }
-                    )
-                    all_handled_aliases.add(alias_pair_key)
+                ast_statements.append(
+                    {
+                        "type": "direct_assignment",
+                        "source_node": member_node,
+                        "target_node": preferred_target_name,
+                        "line": 0,
+                    }
+                )
     return ast_statements
 
 
 def graph_to_structured_ast(graph, dsu):
     """Convert graph back to structured AST representation."""
     processed_components = set()
-    component_nodes_data = _get_component_nodes_data(graph)
+    component_nodes_data, component_connections = _collect_component_nodes(graph)
+    # Every set's members, gathered once for all preferred-name lookups
+    members_by_root = dsu.members_by_root() if dsu else {}
+    preferred_name = _preferred_name_resolver(dsu, members_by_root)
 
     # 1. Emit declarations
     ast_statements, all_declared_comp_names = _emit_declarations(component_nodes_data)
@@ -761,18 +920,20 @@ def graph_to_structured_ast(graph, dsu):
     # 2. Reconstruct multi-terminal component blocks
     ast_statements.extend(
         _reconstruct_multi_terminal_blocks(
-            graph,
+            component_connections,
             component_nodes_data,
-            dsu,
+            preferred_name,
             all_declared_comp_names,
             processed_components,
         )
     )
 
     # 3. Reconstruct series/parallel paths
-    ast_statements.extend(_reconstruct_series_paths(graph, component_nodes_data, dsu, processed_components))
+    ast_statements.extend(
+        _reconstruct_series_paths(component_connections, component_nodes_data, preferred_name, processed_components)
+    )
 
     # 4. Reconstruct direct assignments
-    ast_statements.extend(_reconstruct_direct_assignments(dsu))
+    ast_statements.extend(_reconstruct_direct_assignments(members_by_root, preferred_name))
 
     return ast_statements
@@ -2,6 +2,7 @@
 """Circuit parser implementation."""
 
 import re
+from sys import intern
 
 
 class ProtoCircuitParser:
@@ -34,7 +35,7 @@ class ProtoCircuitParser:
         return True
 
     def _parse_node_element(self, match, line_num, element_str):
-        node_name = match.group(1)
+        node_name = intern(match.group(1))
         if not self._validate_node_name(node_name, line_num, element_str):
             return {"type": "error", "message": f"Invalid node name format: {node_name}"}
         return {"type": "node", "name": node_name}
@@ -47,7 +48,7 @@ class ProtoCircuitParser:
                 f"Must be alphanumeric, starting with letter/underscore."
             )
             return {"type": "error", "message": f"Invalid source instance name format: {name}"}
-        return {"type": "source", "name": name, "polarity": polarity}
+        return {"type": "source", "name": intern(name), "polarity": intern(polarity)}
 
     def _parse_named_current_element(self, match, line_num):
         direction, name = match.groups()
@@ -56,11 +57,11 @@ class ProtoCircuitParser:
                 f"L{line_num}: Invalid current identifier '{name}'. " f"Must be alphanumeric, starting with letter/underscore."
             )
             return {"type": "error", "message": f"Invalid current identifier: {name}"}
-        return {"type": "named_current", "direction": direction, "name": name}
+        return {"type": "named_current", "direction": intern(direction), "name": intern(name)}
 
     def _parse_controlled_or_noise_source_element(self, match, line_num, element_str):
         expr_id = match.group(1).strip()
-        direction = match.group(2)
+        direction = intern(match.group(2))
         if not expr_id:
             self.errors.append(
                 f"L{line_num}: Empty expression/id for controlled/noise source in parallel block: '{element_str}'"
@@ -75,7 +76,7 @@ class ProtoCircuitParser:
                     f"Must be alphanumeric, starting with letter/underscore."
                 )
                 return {"type": "error", "message": f"Invalid noise source id: {expr_id}"}
-            return {"type": "noise_source", "id": expr_id, "direction": direction}
+            return {"type": "noise_source", "id": intern(expr_id), "direction": direction}
 
     def _parse_element(self, element_str, line_num, context="series"):
         # Strip any inline comments first
@@ -101,7 +102,7 @@ class ProtoCircuitParser:
 
         # Default to component instance name if nothing else matches
         if self.COMPONENT_NAME_RE.fullmatch(element_str):  # Check if it's a valid identifier
-            return {"type": "component", "name": element_str}  # Name is instance name
+            return {"type": "component", "name": intern(element_str)}  # Name is instance name
 
         self.errors.append(f"L{line_num}: Unrecognized or malformed element '{element_str}' in {context} context.")
         return {"type": "error", "message": f"Unrecognized element: {element_str}"}
@@ -147,8 +148,8 @@ class ProtoCircuitParser:
             {
                 "type": "declaration",
                 "line": line_num,
-                "component_type": comp_type,
-                "instance_name": inst_name,
+                "component_type": intern(comp_type),
+                "instance_name": intern(inst_name),
             }
         )
         return True
@@ -175,7 +176,7 @@ class ProtoCircuitParser:
                     continue
                 if not self._validate_node_name(node, line_num, f"block for {comp_name}"):
                     continue
-                connections.append({"terminal": term, "node": node})
+                connections.append({"terminal": intern(term), "node": intern(node)})
                 valid_assignments_found_in_block = True
             else:
                 self.errors.append(
@@ -191,7 +192,7 @@ class ProtoCircuitParser:
             {
                 "type": "component_connection_block",
                 "line": line_num,
-                "component_name": comp_name,
+                "component_name": intern(comp_name),
                 "connections": connections,
                 "_original_assignments_str": assignments_str,
             }
@@ -308,8 +309,8 @@ class ProtoCircuitParser:
                 {
                     "type": "direct_assignment",
                     "line": line_num,
-                    "source_node": src,
-                    "target_node": tgt,
+                    "source_node": intern(src),
+                    "target_node": intern(tgt),
                 }
             )
         return True
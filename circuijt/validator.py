@@ -2,8 +2,8 @@
 """Circuit validator implementation."""
 
 import re
-from .components import ComponentDatabase
-from .graph_utils import ast_to_graph, get_component_connectivity
+from .components import DEFAULT_COMPONENT_DB
+from .graph_utils import ast_to_graph, get_component_connectivity, get_node_kinds
 
 
 class ASTValidator:  # pylint: disable=too-few-public-methods
@@ -12,7 +12,7 @@ class ASTValidator:  # pylint: disable=too-few-public-methods
     def __init__(self, parsed_statements):
         self.parsed_statements = parsed_statements
         self.errors = []
-        self.component_db = ComponentDatabase()
+        self.component_db = DEFAULT_COMPONENT_DB
         self.valid_component_types = set(self.component_db.components.keys())
         self.declared_component_types = {}  # InstanceName -> {"type": TypeStr, "line": line_num}
         self.explicitly_defined_nodes = set()
@@ -40,9 +40,7 @@ class ASTValidator:  # pylint: disable=too-few-public-methods
 
         self.explicitly_defined_nodes.add(node_name)
         if connected_to_info:
-            if node_name not in self.node_connection_points:
-                self.node_connection_points[node_name] = []
-            self.node_connection_points[node_name].append(connected_to_info)
+            self.node_connection_points.setdefault(node_name, []).append(connected_to_info)
         return True
 
     def validate(self):
@@ -52,15 +50,19 @@ class ASTValidator:  # pylint: disable=too-few-public-methods
         self.explicitly_defined_nodes = set()
         self.node_connection_points = {}
 
-        self._validate_declarations()
-        self._validate_connections()
+        # Split the statements once so neither pass has to re-check every statement's type
+        declarations, connections = [], []
+        for stmt in self.parsed_statements:
+            (declarations if stmt["type"] == "declaration" else connections).append(stmt)
+
+        self._validate_declarations(declarations)
+        self._validate_connections(connections)
         return self.errors
 
-    def _validate_declarations(self):
+    def _validate_declarations(self, declarations):
         """Validate all component declarations in the AST."""
-        for stmt in self.parsed_statements:
-            if stmt["type"] == "declaration":
-                self._validate_single_declaration(stmt)
+        for stmt in declarations:
+            self._validate_single_declaration(stmt)
 
     def _validate_single_declaration(self, stmt):
         """Validate a single component declaration statement."""
@@ -76,7 +78,7 @@ class ASTValidator:  # pylint: disable=too-few-public-methods
         elif comp_type not in self.valid_component_types:
             self._add_error(
                 f"Unknown component type '{comp_type}' for instance '{inst_name}'. "
-                f"Valid types: {sorted(list(self.valid_component_types))}",
+                f"Valid types: {sorted(self.valid_component_types)}",
                 line_num,
             )
 
@@ -98,12 +100,9 @@ class ASTValidator:  # pylint: disable=too-few-public-methods
                 "line": line_num,
             }
 
-    def _validate_connections(self):
+    def _validate_connections(self, connections):
         """Validate all connection-related statements in the AST."""
-        for stmt in self.parsed_statements:
-            if stmt["type"] == "declaration":
-                continue
-
+        for stmt in connections:
             line_num = stmt.get("line")
             stmt_type = stmt["type"]
 
@@ -327,9 +326,9 @@ class GraphValidator:  # pylint: disable=too-few-public-methods
     def validate(self):
         """Validates the graph, checking for component arity and other structural issues."""
         self.errors = []
-        component_instance_nodes = [
-            n for n, data in self.graph.nodes(data=True) if data.get("node_kind") == "component_instance"
-        ]
+        # One node-kind snapshot serves both the component scan and every neighbour lookup below
+        node_kinds = get_node_kinds(self.graph)
+        component_instance_nodes = [n for n, kind in node_kinds.items() if kind == "component_instance"]
 
         for comp_name in component_instance_nodes:
             if comp_name.startswith("_internal_"):  # Skip internal components like VCCS from parallel blocks
@@ -353,7 +352,7 @@ class GraphValidator:  # pylint: disable=too-few-public-methods
 
             # Get actual connections from the graph
             # get_component_connectivity returns: connections_map (term -> net), raw_connections (list of dicts)
-            connections_map, _ = get_component_connectivity(self.graph, comp_name)
+            connections_map, _ = get_component_connectivity(self.graph, comp_name, node_kinds)
             actual_distinct_terminals_connected = len(connections_map)
 
             if actual_distinct_terminals_connected > expected_arity:
@@ -382,18 +381,21 @@ class CircuitValidator:  # pylint: disable=too-few-public-methods
 
     def __init__(self, parsed_statements):
         self.parsed_statements = parsed_statements
-        self.component_db = ComponentDatabase()
+        self.component_db = DEFAULT_COMPONENT_DB
         self.debug_info = {}  # Store additional debug info
+        # Graph and DSU built by validate(), kept so callers can reuse them instead of
+        # calling ast_to_graph() again. They reflect parsed_statements as of validate().
+        self.graph = None
+        self.dsu = None
 
     def _log_debug_info(self, category, info):
-        if category not in self.debug_info:
-            self.debug_info[category] = []
-        self.debug_info[category].append(info)
+        self.debug_info.setdefault(category, []).append(info)
 
     def validate(self):
         """Performs all validation checks on the circuit AST and graph, returning errors and debug info."""
         all_errors = []
         self.debug_info = {}  # Reset debug info
+        self.graph = self.dsu = None
 
         # 1. AST Validation
         ast_validator = ASTValidator(self.parsed_statements)
@@ -436,6 +438,8 @@ class CircuitValidator:  # pylint: disable=too-few-public-methods
             all_errors.append(err_msg)
             return all_errors, self.debug_info
 
+        self.graph, self.dsu = graph, dsu
+
         # 3. Graph Validation
         graph_validator = GraphValidator(graph, dsu, self.component_db, declared_component_types)
         graph_errors = graph_validator.validate()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Tests for the short circuit analysis functions."""
+from circuijt.analysis import detect_short_circuits, format_short_circuit_report
+from circuijt.graph_utils import ast_to_graph
+from circuijt.parser import ProtoCircuitParser
+
+
+def _detect(circuit):
+    """Parse a circuit and return its detected shorts."""
+    statements, errors = ProtoCircuitParser().parse_text(circuit)
+    assert not errors, f"Parser failed with errors: {errors}"
+    graph, dsu = ast_to_graph(statements)
+    return detect_short_circuits(graph, dsu)
+
+
+def test_no_shorts():
+    """Test that a well-formed circuit reports no shorts."""
+    shorts = _detect(
+        """
+    R R1
+    Nmos M1
+    (in) -- R1 -- (out)
+    M1 { G:(in), S:(GND), D:(out), B:(sub) }
+    """
+    )
+    assert not shorts
+    assert format_short_circuit_report(shorts) == "No topological short circuits detected."
+
+
+def test_component_self_short():
+    """Test that two terminals of one component on the same net are reported."""
+    shorts = _detect(
+        """
+    Nmos M1
+    M1 { G:(in), S:(out), D:(out), B:(GND) }
+    """
+    )
+    assert len(shorts) == 1
+    short = shorts[0]
+    assert short["type"] == "component_self_short"
+    assert short["component"] == "M1"
+    assert short["component_type"] == "Nmos"
+    assert short["terminals"] == ["D", "S"]
+    assert short["net"] == "out"
+    assert "Component Short: 'M1'" in format_short_circuit_report(shorts)
+
+
+def test_global_shorts_between_key_nets():
+    """Test that every pair of shorted key nets is reported once."""
+    shorts = _detect(
+        """
+    (VDD):(GND)
+    (VSS):(GND)
+    (VCC):(x)
+    """
+    )
+    global_shorts = [s for s in shorts if s["type"] == "global_short"]
+    assert [s["nets"] for s in global_shorts] == [["GND", "VDD"], ["VDD", "VSS"], ["GND", "VSS"]]
+    assert all(s["canonical_net"] == "GND" for s in global_shorts)
+    assert "Global Short: Key nets ['GND', 'VDD']" in format_short_circuit_report(shorts)
+
+
+def test_shorts_on_subgraph_and_edited_copy():
+    """Test that analysing a graph first does not affect its subgraph views or copies."""
+    statements, errors = ProtoCircuitParser().parse_text(
+        """
+    Nmos M1
+    R R1
+    M1 { G:(in), S:(out), D:(out), B:(GND) }
+    (in) -- R1 -- (VDD)
+    """
+    )
+    assert not errors
+    graph, dsu = ast_to_graph(statements)
+    assert [s["component"] for s in detect_short_circuits(graph, dsu)] == ["M1"]
+
+    assert detect_short_circuits(graph.subgraph(["R1"]), dsu) == []
+
+    graph_copy = graph.copy()
+    graph_copy.remove_edge("M1", dsu.find("out"), key=0)  # The S terminal, added before D
+    graph_copy.add_node("src", node_kind="electrical_net")
+    graph_copy.add_edge("M1", "src", terminal="S")
+    assert detect_short_circuits(graph_copy, dsu) == []
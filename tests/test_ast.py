@@ -2,8 +2,10 @@
 """Test cases for AST manipulation utilities."""
 
 from circuijt.ast_utils import (
+    build_ast_index,
     find_statements_of_type,
     find_declarations_by_type,
+    iter_statements_of_type,
     summarize_circuit_elements,
 )
 from circuijt.parser import ProtoCircuitParser
@@ -226,6 +228,28 @@ def test_find_parallel_block():
     assert elements[1]["name"] == "C_bypass"
 
 
+def test_iter_statements_of_type():
+    """Test lazily finding top-level statements and series path elements."""
+    code = """
+    R R1
+    V V1
+    (GND) -- V1(-+) -- (in) -- R1 -- (out)
+    (out):(load)
+    """
+
+    parser = ProtoCircuitParser()
+    statements, errors = parser.parse_text(code)
+    assert not errors
+
+    matches = iter_statements_of_type(statements, "node")
+    assert next(matches)["name"] == "GND"
+    assert [node["name"] for node in matches] == ["in", "out"]
+
+    assignments = list(iter_statements_of_type(statements, "direct_assignment"))
+    assert assignments == find_statements_of_type(statements, "direct_assignment")
+    assert [(a["source_node"], a["target_node"]) for a in assignments] == [("out", "load")]
+
+
 def test_find_declarations_by_type():
     """Test finding declarations by component type."""
     code = """
@@ -258,6 +282,31 @@ def test_find_declarations_by_type():
     assert volt_decls[0]["instance_name"] == "V_in"
 
 
+def test_ast_index_matches_scans():
+    """Test that queries against a prebuilt index return the same statements as scanning."""
+    code = """
+    Nmos M1
+    R R1
+    R R2
+    C C1
+    M1 { G:(in), D:(out), S:(GND), B:(GND) }
+    (out) -- R1 -- [ R2 || C1 ] -- (GND)
+    (in):(gate)
+    """
+
+    parser = ProtoCircuitParser()
+    statements, errors = parser.parse_text(code)
+    assert not errors
+
+    index = build_ast_index(statements)
+    statement_types = ("declaration", "series_connection", "node", "component", "parallel_block", "direct_assignment", "error")
+    for statement_type in statement_types:
+        assert find_statements_of_type(index, statement_type) == find_statements_of_type(statements, statement_type)
+    for component_type in ("Nmos", "R", "C", "V"):
+        assert find_declarations_by_type(index, component_type) == find_declarations_by_type(statements, component_type)
+    assert [d["instance_name"] for d in find_declarations_by_type(index, "R")] == ["R1", "R2"]
+
+
 def test_summarize_circuit_elements():
     """Test circuit element summary."""
     code = """
@@ -288,3 +337,23 @@ def test_summarize_circuit_elements():
     assert summary["total_capacitors"] == 1
     assert summary["total_voltages"] == 1
     assert summary["total_parallel_blocks"] == 1
+
+
+def test_summarize_implicit_nodes():
+    """Test that implicit nodes from every series path are counted, with numbering continuing across paths."""
+    code = """
+    R R1
+    R R2
+    C C1
+    C C2
+    (in) -- R1 -- R2 -- (out)
+    (out) -- C1 -- C2 -- (GND)
+    """
+
+    parser = ProtoCircuitParser()
+    statements, errors = parser.parse_text(code)
+    assert not errors
+
+    summary = summarize_circuit_elements(statements)
+    assert summary["details"]["implicit_nodes"] == ["_implicit_node_1", "_implicit_node_2"]
+    assert summary["num_total_nodes"] == 5
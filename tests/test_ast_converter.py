@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 """Tests for the AST converter functions."""
-from circuijt.ast_converter import ast_to_flattened_ast, flattened_ast_to_regular_ast
+from circuijt.ast_converter import ast_to_flattened_ast, flattened_ast_to_regular_ast, iter_flattened_ast
 from circuijt.parser import ProtoCircuitParser
 from circuijt.graph_utils import ast_to_graph, DSU
 
@@ -65,6 +65,121 @@ def test_net_alias_preservation():
     assert found_alias
 
 
+def test_flattening_without_dsu_uses_graph_dsu():
+    """Test that omitting the DSU resolves nets as the DSU from the AST's graph does."""
+    parser = ProtoCircuitParser()
+    circuit = """
+    R R1
+    (node1) -- R1 -- (node2)
+    (node1):(VDD)
+    """
+    statements, errors = parser.parse_text(circuit)
+    assert not errors
+
+    _, dsu = ast_to_graph(statements)
+    assert ast_to_flattened_ast(statements) == ast_to_flattened_ast(statements, dsu)
+
+    aliases = [s for s in ast_to_flattened_ast(statements) if s["type"] == "net_alias"]
+    assert any(a["source_net"] == "node1" and a["canonical_net"] == "VDD" for a in aliases)
+
+
+def test_flattening_is_idempotent():
+    """Test that flattening an already flattened AST keeps all of its statements."""
+    parser = ProtoCircuitParser()
+    circuit = """
+    R R1
+    C C1
+    (in) -- R1 -- (mid) -- C1 -- (GND)
+    (mid):(VDD)
+    """
+    statements, errors = parser.parse_text(circuit)
+    assert not errors
+
+    flattened = ast_to_flattened_ast(statements)
+    assert ast_to_flattened_ast(flattened) == flattened
+    assert ast_to_flattened_ast(flattened, DSU()) == flattened
+
+
+def test_streamed_flattening_matches_list():
+    """Test that the flattening generator yields the same statements and can feed reconstruction directly."""
+    parser = ProtoCircuitParser()
+    circuit = """
+    R R1
+    C C1
+    (out) -- [ R1 || C1 ] -- (GND)
+    """
+    statements, errors = parser.parse_text(circuit)
+    assert not errors
+
+    flattened = ast_to_flattened_ast(statements)
+    assert list(iter_flattened_ast(statements)) == flattened
+    assert flattened_ast_to_regular_ast(iter_flattened_ast(statements)) == flattened_ast_to_regular_ast(flattened)
+
+
+def test_flattening_one_shot_iterable():
+    """Test that flattening reads an iterator of statements as fully as a list."""
+    parser = ProtoCircuitParser()
+    circuit = """
+    R R1
+    C C1
+    (in) -- R1 -- (mid) -- C1 -- (GND)
+    (mid):(VDD)
+    """
+    statements, errors = parser.parse_text(circuit)
+    assert not errors
+
+    flattened = ast_to_flattened_ast(statements)
+    assert ast_to_flattened_ast(iter(statements)) == flattened
+    assert ast_to_flattened_ast(iter(statements), DSU()) == ast_to_flattened_ast(statements, DSU())
+    assert ast_to_flattened_ast(iter(flattened)) == flattened
+
+
+def test_regular_ast_from_pin_connections():
+    """Test rebuilding series and parallel paths directly from hand-written pin connections."""
+
+    def pin(comp, terminal, net):
+        return {"type": "pin_connection", "component_instance": comp, "terminal": terminal, "net": net}
+
+    flattened = [
+        {"type": "declaration", "component_type": "R", "instance_name": "R1"},
+        {"type": "declaration", "component_type": "C", "instance_name": "C1"},
+        {"type": "declaration", "component_type": "R", "instance_name": "R2"},
+        pin("R1", "p1", "out"),
+        pin("R1", "p2", "GND"),
+        pin("C1", "p1", "GND"),
+        pin("C1", "p2", "out"),
+        pin("R2", "p1", "in"),
+        pin("R2", "p2", "out"),
+    ]
+
+    reconstructed = flattened_ast_to_regular_ast(flattened)
+    assert [s for s in reconstructed if s["type"] == "declaration"] == flattened[:3]
+
+    paths = [s["path"] for s in reconstructed if s["type"] == "series_connection"]
+    assert len(paths) == 2
+    assert {
+        "type": "parallel_block",
+        "elements": [{"type": "component", "name": "R1"}, {"type": "component", "name": "C1"}],
+    } in [el for path in paths for el in path]
+    assert [{"type": "node", "name": "in"}, {"type": "component", "name": "R2"}, {"type": "node", "name": "out"}] in paths
+
+
+def test_regular_ast_repeats_component_bridging_nets_through_several_terminals():
+    """Test that a component joining one net pair through several terminals is listed once per such terminal."""
+    flattened = [
+        {"type": "declaration", "component_type": "Nmos", "instance_name": "M1"},
+        {"type": "pin_connection", "component_instance": "M1", "terminal": "G", "net": "a"},
+        {"type": "pin_connection", "component_instance": "M1", "terminal": "D", "net": "a"},
+        {"type": "pin_connection", "component_instance": "M1", "terminal": "S", "net": "b"},
+    ]
+    paths = {
+        (s["path"][0]["name"], s["path"][-1]["name"]): [e["name"] for e in s["path"][1]["elements"]]
+        for s in flattened_ast_to_regular_ast(flattened)
+        if s["type"] == "series_connection"
+    }
+    assert paths == {("a", "b"): ["M1", "M1"], ("a", "a"): ["M1", "M1"]}
+
+
 def test_roundtrip_conversion():
     """Test converting AST to flattened form and back"""
     parser = ProtoCircuitParser()
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 """Tests for circuit parser/validator/graph utilities."""
 
+import io
+
 import pytest
 from circuijt.parser import ProtoCircuitParser
 from circuijt.validator import CircuitValidator
-from circuijt.ast_utils import summarize_circuit_elements, generate_proto_from_ast
+from circuijt.ast_utils import (
+    compile_proto_emitter,
+    summarize_circuit_elements,
+    generate_proto_from_ast,
+    write_proto_from_ast,
+)
 from circuijt.graph_utils import ast_to_graph, graph_to_structured_ast
 
 
@@ -252,6 +259,15 @@ def test_valid_circuit_validator(valid_parsed_statements):
     print("Valid circuit passed validation as expected")
 
 
+def test_validator_keeps_graph(valid_parsed_statements):
+    """Test that the graph and DSU built during validation are kept for reuse."""
+    validator = CircuitValidator(valid_parsed_statements)
+    validator.validate()
+    graph, _ = ast_to_graph(valid_parsed_statements)
+    assert validator.graph is not None and validator.dsu is not None
+    assert set(validator.graph.nodes()) == set(graph.nodes())
+
+
 def test_ast_utils(parsed_statements):
     """Test AST utility functions like summarize_circuit_elements and generate_proto_from_ast."""
     summary = summarize_circuit_elements(parsed_statements)
@@ -263,6 +279,21 @@ def test_ast_utils(parsed_statements):
     assert reconstructed, "Failed to generate proto from AST"
 
 
+def test_compiled_proto_emitter(parsed_statements):
+    """Test that a compiled proto emitter matches generate_proto_from_ast and can be reused."""
+    reconstructed = generate_proto_from_ast(parsed_statements)
+    emit_proto = compile_proto_emitter(parsed_statements)
+    assert emit_proto() == reconstructed
+    assert emit_proto() == reconstructed, "Compiled emitter must be reusable"
+
+
+def test_write_proto_from_ast(parsed_statements):
+    """Test that streaming proto output writes exactly what generate_proto_from_ast returns."""
+    stream = io.StringIO()
+    write_proto_from_ast(parsed_statements, stream)
+    assert stream.getvalue() == generate_proto_from_ast(parsed_statements)
+
+
 def test_graph_utils(parsed_statements):
     """Test graph utility functions like ast_to_graph and graph_to_structured_ast."""
     graph, dsu = ast_to_graph(parsed_statements)
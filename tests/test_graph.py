@@ -1,7 +1,15 @@
 """Tests for graph utility functions."""
 
+import sys
+
 from circuijt.parser import ProtoCircuitParser
-from circuijt.graph_utils import ast_to_graph, graph_to_structured_ast
+from circuijt.graph_utils import (
+    DSU,
+    ast_to_graph,
+    build_net_dsu,
+    get_component_instances,
+    graph_to_structured_ast,
+)
 
 
 # Helper functions to reduce complexity and locals in tests
@@ -475,3 +483,110 @@ def test_graph_to_ast_connections():
         print(f"DSU parents: {dsu.parent}")
         print(f"Reconstructed AST: {reconstructed_ast}")
         raise e
+
+
+def test_component_instances_follow_graph_changes():
+    """Test that component lookups reflect the graph as it is when called"""
+    _, statements = _setup_graph_conversion_test()
+    graph, dsu = ast_to_graph(statements)
+
+    assert set(get_component_instances(graph)) == {"R1", "C1"}
+    graph.add_node("R2", node_kind="component_instance", instance_type="R")
+    graph.add_edge("R2", dsu.find("in"), terminal="t1_series", key="t1_series")
+    assert set(get_component_instances(graph)) == {"R1", "C1", "R2"}
+    assert set(get_component_instances(graph.subgraph(["R1", "C1"]))) == {"R1", "C1"}
+
+
+def test_dsu_long_alias_chain():
+    """Test that find handles alias chains longer than the recursion limit"""
+    chain_length = sys.getrecursionlimit() * 2
+    dsu = DSU()
+    for i in range(chain_length):
+        dsu.union(f"n{i}", f"n{i + 1}", "direct_assignment", {})
+    dsu.union(f"n{chain_length}", "GND", "direct_assignment", {})
+    assert dsu.find("n0") == "GND"
+    assert len(dsu.get_set_members("GND")) == chain_length + 2
+
+    # A degenerate parent chain (as left by forced preferred-root links) must not recurse
+    dsu = DSU()
+    for i in range(chain_length):
+        dsu.add_set(f"m{i}")
+    for i in range(chain_length - 1):
+        dsu.parent[f"m{i}"] = f"m{i + 1}"
+    assert dsu.find("m0") == f"m{chain_length - 1}"
+    # Path splitting points every node on the walked path at its former grandparent
+    assert dsu.parent["m0"] == "m2" and dsu.parent["m1"] == "m3"
+    assert dsu.find("m0") == f"m{chain_length - 1}"
+
+
+def test_dsu_find_follows_unions():
+    """Test that finds interleaved with unions return the current root"""
+    dsu = DSU()
+    dsu.union("a", "b", "direct_assignment", {})
+    dsu.union("c", "d", "direct_assignment", {})
+    assert dsu.find("a") == dsu.find("b")
+    assert dsu.find("c") != dsu.find("a")
+
+    dsu.union("b", "GND", "direct_assignment", {})
+    assert dsu.find("a") == "GND" and dsu.find("b") == "GND"
+    dsu.union("d", "a", "direct_assignment", {})
+    assert {dsu.find(name) for name in "abcd"} == {"GND"}
+
+
+def test_build_net_dsu_matches_graph_dsu():
+    """Test that the graph-free DSU resolves every net like the one from ast_to_graph."""
+    parser = ProtoCircuitParser()
+    circuit = """
+    Nmos M1
+    R R1
+    M1 { G:(in), D:(out), S:(GND), B:(GND) }
+    X1 { A:(out) }
+    (out) -- R1 -- (VDD)
+    (in):(bias)
+    (M1.D):(drain)
+    """
+    statements, errors = parser.parse_text(circuit)
+    assert not errors
+
+    _, graph_dsu = ast_to_graph(statements)
+    dsu = build_net_dsu(statements)
+    assert set(dsu.parent) <= set(graph_dsu.parent)
+    for name in dsu.parent:
+        assert dsu.find(name) == graph_dsu.find(name)
+
+
+def test_ast_to_graph_accepts_one_shot_iterable():
+    """Test that statements can be streamed, including connections that precede their component's declaration."""
+    parser = ProtoCircuitParser()
+    circuit = """
+    (in) -- R1 -- (out)
+    M1 { G:(in), D:(out), S:(GND), B:(GND) }
+    R R1
+    Nmos M1
+    """
+    statements, errors = parser.parse_text(circuit)
+    assert not errors
+
+    graph, _ = ast_to_graph(statements)
+    streamed_graph, _ = ast_to_graph(iter(statements))
+    assert list(streamed_graph.nodes(data=True)) == list(graph.nodes(data=True))
+    assert list(streamed_graph.edges(keys=True, data=True)) == list(graph.edges(keys=True, data=True))
+    assert {d["terminal"] for _, _, d in graph.edges("M1", data=True)} == {"G", "D", "S", "B"}
+    assert graph.degree("R1") == 2
+
+
+def test_graph_to_ast_reads_current_graph():
+    """Test that reconstruction reflects a copy that was changed after the original was converted"""
+    _, statements = _setup_graph_conversion_test()
+    graph, dsu = ast_to_graph(statements)
+    graph_to_structured_ast(graph, dsu)
+
+    graph_copy = graph.copy()
+    graph_copy.add_node("R2", node_kind="component_instance", instance_type="R")
+    graph_copy.add_edge("R2", dsu.find("in"), terminal="t1_series", key="t1_series")
+    reconstructed = graph_to_structured_ast(graph_copy, dsu)
+    declared = {s["instance_name"] for s in reconstructed if s["type"] == "declaration"}
+    assert declared == {"R1", "C1", "R2"}
+    declared = {s["instance_name"] for s in graph_to_structured_ast(graph, dsu) if s["type"] == "declaration"}
+    assert declared == {"R1", "C1"}
+